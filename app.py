@@ -1,15 +1,108 @@
-from flask import Flask, render_template, request
-import subprocess
+import time
+
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, abort, send_file
+
+from hotrun import get_base_url_and_mac_from_file
+from jobs import runner, python_command, follow_log
+from channel_catalog import catalog
 
 app = Flask(__name__)
 
+# One line per MAC in hotrun's output marks it as done
+HOTRUN_PROGRESS = r"Successfully saved MAC|Failed to get|Error processing MAC"
+
+# Comment sent on idle event streams so proxies don't drop the connection
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def submit_hotrun():
+    total = len(get_base_url_and_mac_from_file("fixmac.txt"))
+    return runner.submit("hotrun", python_command("hotrun.py"), HOTRUN_PROGRESS, total)
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
-    output = ""
     if request.method == "POST":
-        result = subprocess.run(["python3", "hotrun.py"], capture_output=True, text=True)
-        output = result.stdout or result.stderr
-    return render_template("index.html", output=output)
+        job = submit_hotrun()
+        return redirect(url_for("index", job=job.id))
+    job = runner.get(request.args.get("job", "")) if request.args.get("job") else None
+    return render_template("index.html", job=job, jobs=runner.recent())
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    job = submit_hotrun()
+    return jsonify(job.to_dict()), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = runner.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>/log")
+def job_log(job_id):
+    job = runner.get(job_id)
+    if job is None:
+        abort(404)
+    return send_file(job.log_path, mimetype="text/plain", max_age=0)
+
+
+@app.route("/jobs/<job_id>/stream")
+def job_stream(job_id):
+    """Server-sent events with the job's output; Last-Event-ID resumes from a byte offset."""
+    job = runner.get(job_id)
+    if job is None:
+        abort(404)
+    try:
+        offset = int(request.headers.get("Last-Event-ID") or request.args.get("offset", 0))
+    except ValueError:
+        offset = 0
+
+    def events():
+        last_sent = time.time()
+        for position, line in follow_log(job, offset):
+            if line is None:
+                if time.time() - last_sent >= SSE_HEARTBEAT_SECONDS:
+                    last_sent = time.time()
+                    yield ": keep-alive\n\n"
+                continue
+            last_sent = time.time()
+            # A carriage return would end the SSE field; keep what a terminal would show
+            yield f"id: {position}\ndata: {line.rsplit(chr(13), 1)[-1]}\n\n"
+        yield f"event: end\ndata: {job.status}\n\n"
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def payload_response(payload):
+    """Serve a pre-serialized catalog payload with ETag and gzip support."""
+    headers = {"ETag": payload.etag, "Cache-Control": "public, max-age=30", "Vary": "Accept-Encoding"}
+    if request.if_none_match.contains_weak(payload.etag.strip('"')):
+        return Response(status=304, headers=headers)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzip_body, mimetype="application/json", headers=headers)
+    return Response(payload.body, mimetype="application/json", headers=headers)
+
+
+@app.route("/api/channels")
+def api_channels():
+    group = request.args.get("group")
+    return payload_response(catalog.group(group) if group else catalog.all())
+
+
+@app.route("/api/channels/<channel_id>")
+def api_channel(channel_id):
+    payload = catalog.channel(channel_id)
+    if payload is None:
+        abort(404)
+    return payload_response(payload)
+
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,5 +1,12 @@
 import requests
 import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+from epg_store import EpgStore
 
 # Request URL and Headers
 url = "https://web1.azamtvltd.co.tz/api/method/azam_tv.azam_tv.api.get_show_by_date_and_country"
@@ -14,11 +21,24 @@ headers = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
 }
 
-# Your payload (customize date and country if needed)
-payload = {
-    "date": "2025-04-27",
-    "country": "TANZANIA"
-}
+# Date range and countries to harvest (customize if needed)
+start_date = date.today()
+days = 7
+countries = ["TANZANIA", "KENYA", "UGANDA"]
+
+# Concurrent requests over one pooled session
+max_workers = 8
+
+# Per (date, country) response cache. A day fetched after it ended is final and
+# never refetched; anything else is revalidated once older than max_age.
+cache_folder = "epg_cache"
+cache_max_age = 3 * 60 * 60  # seconds
+# How long after local midnight a day counts as over (the schedule's time zone may differ)
+day_end_margin = 6 * 60 * 60  # seconds
+
+# Output files
+shows_output_filename = "azam_tv_shows.json"
+output_filename = "azam_tv_live_shows.json"
 
 # Mapping channels to channelId and logo
 channel_mapping = {
@@ -32,48 +52,165 @@ channel_mapping = {
     }
 }
 
-# Send POST request
-response = requests.post(url, headers=headers, json=payload)
 
-# Check if request was successful
-if response.status_code == 200:
-    result = response.json()
-    
-    # Get the list of program_details
-    program_details = result.get("message", {}).get("program_details", [])
+def create_session():
+    """Create a session whose connection pool fits max_workers concurrent requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def cache_path(day, country):
+    return os.path.join(cache_folder, f"{country.lower()}_{day.isoformat()}.json")
+
+
+def load_cached(day, country):
+    """Return the cached entry for (day, country), or None."""
+    try:
+        with open(cache_path(day, country), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(day, country, entry):
+    os.makedirs(cache_folder, exist_ok=True)
+    path = cache_path(day, country)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def is_fresh(day, entry):
+    """
+    Days fetched after they ended are final; anything else expires after cache_max_age.
+    A past day fetched while it was still running may be incomplete, so it is revalidated.
+    """
+    fetched_at = entry.get("fetched_at", 0)
+    day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+    if fetched_at >= day_end + day_end_margin:
+        return True
+    return time.time() - fetched_at < cache_max_age
+
+
+def fetch_programs(session, day, country):
+    """
+    Get the program list for one date and country, using the cache when possible.
+    Returns:
+        List of program dicts (empty on failure)
+    """
+    cached = load_cached(day, country)
+    if cached is not None and is_fresh(day, cached):
+        return cached["program_details"]
+
+    request_headers = dict(headers)
+    if cached is not None:
+        # Revalidate instead of downloading the schedule again when the server supports it
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
 
+    payload = {"date": day.isoformat(), "country": country}
+    try:
+        response = session.post(url, headers=request_headers, json=payload, timeout=30)
+    except Exception as e:
+        print(f"❌ Request for {country} {day} failed: {e}")
+        return cached["program_details"] if cached else []
+
+    if response.status_code == 304 and cached is not None:
+        cached["fetched_at"] = time.time()
+        save_cached(day, country, cached)
+        return cached["program_details"]
+
+    if response.status_code != 200:
+        print(f"❌ Request for {country} {day} failed with status: {response.status_code}")
+        return cached["program_details"] if cached else []
+
+    try:
+        program_details = response.json().get("message", {}).get("program_details", [])
+    except (ValueError, AttributeError):
+        # An HTML error page, a truncated body or an unexpected shape; keep the harvest going
+        print(f"❌ Request for {country} {day} returned invalid JSON")
+        return cached["program_details"] if cached else []
+    save_cached(day, country, {
+        "fetched_at": time.time(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "program_details": program_details,
+    })
+    return program_details
+
+
+def harvest_programs(first_day=None, day_count=None, country_list=None):
+    """
+    Fetch every (date, country) pair concurrently and merge the results.
+    Returns:
+        Merged program list, deduplicated by program id and sorted by start time
+    """
+    first_day = first_day or start_date
+    day_count = day_count or days
+    country_list = country_list or countries
+    jobs = [(first_day + timedelta(days=offset), country)
+            for offset in range(day_count) for country in country_list]
+
+    merged = {}
+    with create_session() as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_programs, session, day, country): (day, country) for day, country in jobs}
+        for future in as_completed(futures):
+            day, country = futures[future]
+            programs = future.result()
+            print(f"📅 {country} {day}: {len(programs)} programs")
+            for program in programs:
+                if isinstance(program, dict):
+                    key = program.get("id") or (program.get("channel_name"), program.get("since"))
+                    merged[key] = program
+
+    return sorted(merged.values(), key=lambda p: (p.get("since", ""), p.get("channel_name", "")))
+
+
+def build_live_shows(store):
     live_data = {}
     counter = 1
 
-    # Process each program
-    for program in program_details:
-        if isinstance(program, dict):
-            title = program.get("title", "")
-            channel_name = program.get("channel_name", "")
-
-            # Filter for "live" in title and specific channels
-            if "live" in title.lower() and channel_name in channel_mapping:
-                channel_info = channel_mapping[channel_name]
-
-                live_data[str(counter)] = {
-                    "title": title,
-                    "since": program.get("since", ""),
-                    "channel_name": channel_name,
-                    "channelId": channel_info["channelId"],
-                    "urlLogo": channel_info["urlLogo"]
-                }
-                counter += 1
+    # The store already indexes programs with "live" in the title
+    for program in store.live_programs():
+        channel_name = program.get("channel_name", "")
+
+        # Filter for specific channels
+        if channel_name in channel_mapping:
+            channel_info = channel_mapping[channel_name]
+
+            live_data[str(counter)] = {
+                "title": program.get("title", ""),
+                "since": program.get("since", ""),
+                "channel_name": channel_name,
+                "channelId": channel_info["channelId"],
+                "urlLogo": channel_info["urlLogo"]
+            }
+            counter += 1
 
     # Wrap inside "live" collection
-    output = {"live": live_data}
+    return {"live": live_data}
+
+
+def main():
+    program_details = harvest_programs()
+
+    # Save the merged schedule in the same shape as the API response
+    with open(shows_output_filename, "w", encoding="utf-8") as f:
+        json.dump({"message": {"program_details": program_details}}, f, ensure_ascii=False, indent=4)
+    print(f"✅ {len(program_details)} programs saved to {shows_output_filename}")
 
     # Save to JSON file
-    output_filename = "azam_tv_live_shows.json"
+    output = build_live_shows(EpgStore(program_details))
     with open(output_filename, "w", encoding="utf-8") as f:
         json.dump(output, f, ensure_ascii=False, indent=4)
-    
+
     print(f"✅ Filtered live shows saved to {output_filename}")
 
-else:
-    print(f"❌ Request failed with status: {response.status_code}")
-    print(response.text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+import re
+import gzip
+import json
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from channel_names import resolve_channel
+from epg_store import EpgStore
+
+# Input schedule written by azam_epg.py
+shows_input_filename = "azam_tv_shows.json"
+
+# Output guide; a .gz suffix writes gzip-compressed XMLTV
+xmltv_output_filename = "azam_epg.xml.gz"
+
+# Only export channels that have validated streams in best_channels/*.json
+only_validated = False
+best_channels_folder = "best_channels"
+
+logo_url = "https://raw.githubusercontent.com/sinkalatz/my_tv/refs/heads/main/{channel_id}.png"
+azam_image_base = "https://web1.azamtvltd.co.tz"
+
+# Offset of the naive timestamps in the Azam schedule (East Africa Time)
+utc_offset = "+0300"
+
+
+def display_name(channel_name):
+    """Turn "117-Azam Sports 1 HD-TANZANIA" into "Azam Sports 1 HD"."""
+    name = re.sub(r'^\d+-', '', channel_name)
+    return re.sub(r'-[A-Z ]+$', '', name).strip()
+
+
+def resolve_channel_id(channel_name):
+    """
+    Map an EPG channel name to the id used in best_channels JSON.
+    Returns:
+        (channel_id, matched) where matched is False for a slug fallback
+    """
+    name = display_name(channel_name)
+    channel_id = resolve_channel(name)
+    if channel_id:
+        return channel_id, True
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_'), False
+
+
+def load_validated_ids(folder=best_channels_folder):
+    """Channel ids that currently have validated streams."""
+    ids = set()
+    if not os.path.isdir(folder):
+        return ids
+    for file_name in os.listdir(folder):
+        if file_name.endswith(".json"):
+            try:
+                with open(os.path.join(folder, file_name), "r", encoding="utf-8") as f:
+                    ids.update(json.load(f).get("channels", {}))
+            except (OSError, ValueError):
+                continue
+    return ids
+
+
+def xmltv_time(moment):
+    return moment.strftime("%Y%m%d%H%M%S") + " " + utc_offset
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def write_xmltv(store, path):
+    """
+    Stream an XMLTV guide for every channel in the store.
+    Programs are written one at a time, so the whole document is never built in memory.
+    Returns:
+        Number of programs written
+    """
+    validated = load_validated_ids() if only_validated else None
+
+    channels = []
+    seen_ids = set()
+    for channel_name in store.channels():
+        if not channel_name:
+            # Programs the API returned without a channel can't be placed in the guide
+            continue
+        channel_id, matched = resolve_channel_id(channel_name)
+        # The same channel is listed once per country; keep a single schedule per id
+        if channel_id in seen_ids or (validated is not None and channel_id not in validated):
+            continue
+        seen_ids.add(channel_id)
+        channels.append((channel_name, channel_id, matched))
+
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with open_output(tmp_path, path.endswith(".gz")) as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write('<!DOCTYPE tv SYSTEM "xmltv.dtd">\n')
+        out.write('<tv generator-info-name="paix azam_xmltv">\n')
+
+        for channel_name, channel_id, matched in channels:
+            programs = store.by_channel[channel_name].programs
+            if matched:
+                icon = logo_url.format(channel_id=channel_id)
+            else:
+                image = (programs[0].get("image") or "") if programs else ""
+                icon = azam_image_base + quote(image) if image else ""
+            out.write(f'  <channel id={quoteattr(channel_id)}>\n')
+            out.write(f'    <display-name>{escape(display_name(channel_name))}</display-name>\n')
+            if icon:
+                out.write(f'    <icon src={quoteattr(icon)} />\n')
+            out.write('  </channel>\n')
+
+        for channel_name, channel_id, _ in channels:
+            for program in store.by_channel[channel_name].programs:
+                out.write(f'  <programme start="{xmltv_time(program["_start"])}" '
+                          f'stop="{xmltv_time(program["_end"])}" channel={quoteattr(channel_id)}>\n')
+                out.write(f'    <title>{escape(program.get("title") or "")}</title>\n')
+                out.write('  </programme>\n')
+                count += 1
+
+        out.write('</tv>\n')
+    os.replace(tmp_path, path)
+    return count
+
+
+def main():
+    store = EpgStore.from_file(shows_input_filename)
+    count = write_xmltv(store, xmltv_output_filename)
+    print(f"✅ {count} programs written to {xmltv_output_filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Benchmarks for the pure-CPU paths of the harvest and publishing scripts.
+
+A synthetic portal response (channels plus genres, with the Iranian, sports
+and brand names the real code looks for) is generated at the requested size,
+then each case is timed over several repeats and run once more under
+tracemalloc for its peak allocation:
+
+    sort_groups              hotrun.sort_groups over every genre name
+    save_channel_list        hotrun.save_channel_list writing one MACn.m3u
+    filter_and_sort          m3uchecking.filter_and_sort_channels on the playlist text
+    extract_<brand>          best_*.py extract_*_entries on the written playlist
+    channel_filename_<brand> best_*.py get_channel_filename for every channel name,
+                             starting from empty name caches
+
+Results are compared with the stored baselines in bench_cpu_baseline.json
+(keyed by case and corpus size); a case that gets slower or allocates more than
+the threshold fails the run. Baselines are machine specific, so refresh them
+with --save-baseline on the machine that runs the comparison.
+
+    python bench_cpu.py
+    python bench_cpu.py --channels 1000000 --genres 5000 --repeat 3
+    python bench_cpu.py --save-baseline
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import hotrun
+import m3uchecking
+import best_azam
+import best_azam_sports
+import best_trace
+import best_optus
+import best_tnt_sports
+import channel_names
+from bench_harvest import compare
+from hotrun import print_colored
+
+baseline_file = "bench_cpu_baseline.json"
+default_threshold = 0.25
+
+CPU_METRICS = (("median_ms", False), ("peak_alloc_kb", False))
+
+BRAND_MODULES = {
+    "azam": (best_azam, best_azam.extract_azam_entries),
+    "azam_sport": (best_azam_sports, best_azam_sports.extract_azam_sport_entries),
+    "trace": (best_trace, best_trace.extract_trace_entries),
+    "optus": (best_optus, best_optus.extract_optus_entries),
+    "tnt_sport": (best_tnt_sports, best_tnt_sports.extract_tnt_sport_entries),
+}
+
+GROUP_WORDS = ["IRAN", "Persian", "IR | News", "beIN", "Sports", "Spor TR", "Canal+", "DAZN", "Paramount",
+               "Iraq", "Ireland", "UK", "US", "FR", "DE", "Kids", "Movies", "Music", "Documentary", "Africa"]
+CHANNEL_NAMES = ["Azam One HD", "Azam Two HD", "Azam Sports {n} HD", "Azam Sport {n}", "Sinema Zetu HD",
+                 "Trace Urban", "Trace Mziki", "Trace Africa FHD", "Optus {n} HD", "Optus Sport {n}",
+                 "TNT Sports {n} HD", "TNT Sport {n}", "BBC One", "CNN", "Al Jazeera", "beIN Sports {n}",
+                 "Manoto", "GEM TV", "Sky Cinema {n}", "Discovery"]
+
+
+def generate_portal(channels: int, genres: int, seed: int = 1) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Synthetic get_all_channels / get_genres results in the shape hotrun.py receives.
+    Args:
+        channels: Number of channels, up to millions
+        genres: Number of genres
+        seed: Random seed, so runs with the same sizes use the same corpus
+    Returns:
+        (channels_data, group_info)
+    """
+    rng = random.Random(seed)
+    group_info = {str(i + 1): f"{rng.choice(GROUP_WORDS)} {i + 1}" for i in range(genres)}
+    channels_data = []
+    for i in range(channels):
+        channel_id = 10000 + i
+        cmd = (f"ffmpeg http://localhost/ch/{channel_id}_" if i % 2
+               else f"ffmpeg http://stream.example.com/live/{channel_id}.ts")
+        channels_data.append({
+            "id": str(channel_id),
+            "name": rng.choice(CHANNEL_NAMES).format(n=rng.randint(1, 12)),
+            "logo": f"http://logo.example.com/{channel_id}.png",
+            "tv_genre_id": str(rng.randint(1, max(1, genres))),
+            "cmd": cmd,
+            "cmds": [{"url": cmd}],
+        })
+    return channels_data, group_info
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Wall time over repeat runs, then one run under tracemalloc for the allocation peak."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_ms": round(1000 * min(times), 3),
+        "median_ms": round(1000 * median(times), 3),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def clear_name_caches() -> None:
+    """Drop the channel_names caches so every repeat resolves names cold."""
+    channel_names.normalize_name.cache_clear()
+    channel_names.all_channels.resolve.cache_clear()
+    for resolver in channel_names.resolvers.values():
+        resolver.resolve.cache_clear()
+
+
+def build_cases(channels_data: List[Dict[str, Any]], group_info: Dict[str, str]) -> List[Tuple[str, Callable[[], Any]]]:
+    base_url = "http://portal.example.com:80"
+    mac = "00:1A:79:00:00:01"
+    group_names = list(group_info.values())
+    names = [channel["name"] for channel in channels_data]
+
+    # Inputs for the later cases come from the same code paths the scripts use
+    hotrun.save_channel_list(base_url, mac, channels_data, group_info, 1)
+    playlist_path = os.path.join("specialiptvs", "MAC1.m3u")
+    with open(playlist_path, "r", encoding="utf-8") as f:
+        playlist_text = f.read()
+
+    cases = [
+        ("sort_groups", lambda: hotrun.sort_groups(group_names)),
+        ("save_channel_list", lambda: hotrun.save_channel_list(base_url, mac, channels_data, group_info, 1)),
+        ("filter_and_sort", lambda: m3uchecking.filter_and_sort_channels(playlist_text)),
+    ]
+    for brand, (_, extract) in BRAND_MODULES.items():
+        cases.append((f"extract_{brand}", lambda extract=extract: extract(playlist_path)))
+    for brand, (module, _) in BRAND_MODULES.items():
+        resolve = module.get_channel_filename
+        # Caches start empty each repeat; repeated names within a run still hit them, as in a real playlist
+        cases.append((f"channel_filename_{brand}",
+                      lambda resolve=resolve: (clear_name_caches(), [resolve(name) for name in names])))
+    return cases
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the CPU paths of the harvest and publishing scripts")
+    parser.add_argument("--channels", type=int, default=20000, help="channels in the synthetic portal")
+    parser.add_argument("--genres", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", help="comma-separated case names or prefixes to run")
+    parser.add_argument("--baseline", default=baseline_file)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=default_threshold,
+                        help="relative slowdown or allocation growth that fails the run")
+    args = parser.parse_args(argv)
+
+    baseline_path = os.path.abspath(args.baseline)
+    channels_data, group_info = generate_portal(args.channels, args.genres)
+    selected = [c.strip() for c in args.cases.split(",")] if args.cases else None
+
+    results: Dict[str, Dict[str, float]] = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_cpu_") as workdir:
+        # save_channel_list writes specialiptvs/ relative to the working directory
+        os.chdir(workdir)
+        try:
+            for name, func in build_cases(channels_data, group_info):
+                if selected and not any(name.startswith(prefix) for prefix in selected):
+                    continue
+                key = f"{name}@{args.channels}x{args.genres}"
+                results[key] = measure(func, args.repeat)
+                print_colored(f"{key:<40} median {results[key]['median_ms']:>10.2f} ms   "
+                              f"min {results[key]['min_ms']:>10.2f} ms   "
+                              f"peak alloc {results[key]['peak_alloc_kb']:>10.1f} KB", "cyan")
+        finally:
+            os.chdir(cwd)
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=4)
+        print_colored(f"Saved {len(results)} baselines to {baseline_path}", "green")
+        return
+
+    regressions = [f"{key} {line}" for key in results if key in baseline
+                   for line in compare(results[key], baseline[key], args.threshold, CPU_METRICS)]
+    compared = sum(1 for key in results if key in baseline)
+    if regressions:
+        for line in regressions:
+            print_colored(f"Regression: {line}", "red")
+        sys.exit(1)
+    if compared:
+        print_colored(f"No regressions in {compared} cases with a baseline", "green")
+    else:
+        print_colored(f"No baselines for these sizes in {baseline_path}; run with --save-baseline", "yellow")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+End-to-end harvest benchmark against the local mock portal.
+
+Starts mock_portal.py in a separate process (so its threads and memory are not
+counted), runs hotrun.process_mac for every generated MAC with the same thread
+pool hotrun.main uses, and reports MACs/sec, p50/p99 per-MAC latency, peak RSS
+and peak thread count of the harvester.
+
+    python bench_harvest.py --macs 300 --channels 5000 --latency 0.05
+    python bench_harvest.py --output bench_harvest.json
+    python bench_harvest.py --baseline bench_harvest.json   # exit 1 on regression
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+import hotrun
+import mock_portal
+
+# Relative change in a metric that counts as a regression when comparing to a baseline
+default_tolerance = 0.2
+sample_interval = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_portal(config: mock_portal.PortalConfig, port: int) -> None:
+    mock_portal.MockPortal(config, port=port).serve_forever()
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Mock portal did not start on port {port}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class ResourceMonitor:
+    """Samples RSS and thread count of this process on a background thread."""
+
+    def __init__(self, interval: float = sample_interval):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak_rss = 0
+        self.peak_threads = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+
+    def _sample(self) -> None:
+        self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+        self.peak_threads = max(self.peak_threads, self.process.num_threads())
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "ResourceMonitor":
+        self._sample()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self._sample()
+
+
+def run_harvest(base_url: str, macs: List[str], workers: int) -> Dict:
+    """Harvest every MAC from base_url and collect timings and resource peaks."""
+    latencies = []
+    succeeded = 0
+    with ResourceMonitor() as monitor:
+        started = time.perf_counter()
+
+        def timed(mac: str, counter: int):
+            t0 = time.perf_counter()
+            entries = hotrun.process_mac(base_url, mac, counter)
+            return time.perf_counter() - t0, entries
+
+        # hotrun prints progress for every MAC; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(timed, mac, idx + 1) for idx, mac in enumerate(macs)]
+                for future in as_completed(futures):
+                    try:
+                        elapsed, entries = future.result()
+                    except Exception:
+                        continue
+                    latencies.append(elapsed)
+                    if entries:
+                        succeeded += 1
+        elapsed = time.perf_counter() - started
+
+    return {
+        "macs": len(macs),
+        "succeeded": succeeded,
+        "failed": len(macs) - succeeded,
+        "elapsed": round(elapsed, 3),
+        "macs_per_sec": round(len(macs) / elapsed, 2) if elapsed else 0.0,
+        "p50": round(percentile(latencies, 50), 4),
+        "p99": round(percentile(latencies, 99), 4),
+        "peak_rss_mb": round(monitor.peak_rss / (1024 * 1024), 1),
+        "peak_threads": monitor.peak_threads,
+    }
+
+
+# (metric, True if higher is better) checked against a baseline
+HARVEST_METRICS = (("macs_per_sec", True), ("p50", False), ("p99", False),
+                   ("peak_rss_mb", False), ("peak_threads", False))
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float,
+            metrics: Tuple[Tuple[str, bool], ...] = HARVEST_METRICS) -> List[str]:
+    """Metrics that got worse than the baseline by more than tolerance."""
+    regressions = []
+    for metric, higher_is_better in metrics:
+        old, new = baseline.get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark hotrun.py against a local mock portal")
+    parser.add_argument("--macs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=300, help="harvest threads (hotrun.main uses 300)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance)
+    mock_portal.add_portal_arguments(parser)
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    config = mock_portal.config_from_args(args)
+    server = multiprocessing.Process(target=serve_portal, args=(config, port), daemon=True)
+    server.start()
+    workdir = tempfile.mkdtemp(prefix="bench_harvest_")
+    cwd = os.getcwd()
+    try:
+        wait_for_port(port)
+        # process_mac writes specialiptvs/ relative to the working directory
+        os.chdir(workdir)
+        results = run_harvest(f"http://127.0.0.1:{port}", mock_portal.generate_macs(args.macs), args.workers)
+    finally:
+        os.chdir(cwd)
+        server.terminate()
+        server.join()
+
+    results["config"] = {key: value for key, value in vars(config).items()}
+    hotrun.print_colored(
+        f"{results['macs']} MACs ({results['failed']} failed) in {results['elapsed']}s: "
+        f"{results['macs_per_sec']} MACs/sec, p50 {results['p50']}s, p99 {results['p99']}s, "
+        f"peak RSS {results['peak_rss_mb']} MB, peak threads {results['peak_threads']}",
+        "cyan",
+    )
+    print(f"Output written to {workdir}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            for line in regressions:
+                hotrun.print_colored(f"Regression: {line}", "red")
+            sys.exit(1)
+        hotrun.print_colored("No regressions against baseline", "green")
+
+
+if __name__ == "__main__":
+    main()
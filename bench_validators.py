@@ -0,0 +1,238 @@
+"""
+Benchmark the stream validators against synthetic streams.
+
+Starts mock_streams.py in a separate process and runs each validator's
+download_stream over a mix of healthy, slow-starting, low-bitrate, stalling,
+dropping, hanging, erroring and dead streams. Each stream has a known verdict,
+so the report shows accuracy (with false positives and negatives) as well as
+time-to-verdict, CPU time per probe and memory.
+
+HLS streams (healthy, dead segments, stalled segments) are probed too but not
+scored: the validators only download the playlist body and never request
+segments, so their HLS verdicts say nothing about segment health. They are
+listed separately to show that blind spot.
+
+    python bench_validators.py --streams 200 --concurrency 50 --duration 10
+    python bench_validators.py --validators best,teststream --output bench_validators.json
+    python bench_validators.py --baseline bench_validators.json   # exit 1 on regression
+
+Without --duration every validator uses its own default probe length
+(toptv.py probes for 80 seconds).
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import best_azam
+import toptv
+import teststream
+import mock_streams
+from bench_harvest import ResourceMonitor, compare, free_port, percentile, wait_for_port, default_tolerance
+from hotrun import print_colored
+
+# The best_*.py scripts share one download_stream implementation
+VALIDATORS: Dict[str, Callable[..., bool]] = {
+    "best": best_azam.download_stream,
+    "toptv": toptv.download_stream,
+    "teststream": teststream.download_stream,
+}
+
+# (name, kind, options, should be judged valid)
+SCENARIOS = [
+    ("healthy_hd", "ts", {"bitrate": 4000}, True),
+    ("healthy_sd", "ts", {"bitrate": 1200}, True),
+    ("slow_start", "ts", {"bitrate": 2000, "slow_start": 2}, True),
+    ("low_bitrate", "ts", {"bitrate": 96}, False),
+    ("stall", "ts", {"bitrate": 2000, "stall_at": 2, "stall_for": 120}, False),
+    ("drop", "ts", {"bitrate": 2000, "drop_at": 2}, False),
+    ("hang", "hang", {}, False),
+    ("dead_host", "dead", {}, False),
+    ("http_503", "status", {"code": 503}, False),
+]
+
+# (name, options, playable); reported, not scored
+HLS_SCENARIOS = [
+    ("hls_healthy", {"bitrate": 2000}, True),
+    ("hls_dead_segments", {"bitrate": 2000, "segment_status": 404}, False),
+    ("hls_stalled_segments", {"bitrate": 2000, "stall_at": 1, "stall_for": 120}, False),
+]
+
+VALIDATOR_METRICS = (("accuracy", True), ("verdict_p50", False), ("verdict_p99", False),
+                     ("cpu_ms_mean", False), ("peak_rss_mb", False))
+
+
+def serve_streams(port: int) -> None:
+    mock_streams.MockStreamServer(port=port).serve_forever()
+
+
+def build_streams(base_url: str, count: int, scenarios=SCENARIOS) -> List[Tuple[str, str, bool]]:
+    """(scenario, url, expected) for count streams, cycling through the scenarios."""
+    streams = []
+    for i in range(count):
+        name, kind, options, expected = scenarios[i % len(scenarios)]
+        if kind == "dead":
+            url = mock_streams.dead_url()
+        elif kind in ("ts", "hls"):
+            # A distinct query per stream so nothing along the way can share responses
+            url = mock_streams.stream_url(base_url, kind, id=i, **options)
+        else:
+            url = mock_streams.stream_url(base_url, kind, **options)
+        streams.append((name, url, expected))
+    return streams
+
+
+def run_validator(validate: Callable[..., bool], streams: List[Tuple[str, str, bool]],
+                  concurrency: int, duration: Optional[float]) -> Dict:
+    """Probe every stream with one validator and summarize its verdicts."""
+
+    def probe(url: str) -> Tuple[bool, float, float]:
+        cpu_start = time.thread_time()
+        started = time.perf_counter()
+        try:
+            verdict = validate(url) if duration is None else validate(url, duration=duration)
+        except Exception:
+            verdict = False
+        return bool(verdict), time.perf_counter() - started, time.thread_time() - cpu_start
+
+    with ResourceMonitor() as monitor:
+        baseline_rss = monitor.peak_rss
+        # The validators print and draw tqdm bars for every probe
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(lambda stream: probe(stream[1]), streams))
+
+    by_scenario: Dict[str, Dict] = {}
+    false_positives = false_negatives = 0
+    for (name, _, expected), (verdict, elapsed, _) in zip(streams, outcomes):
+        scenario = by_scenario.setdefault(name, {"expected": expected, "correct": 0, "total": 0, "times": []})
+        scenario["total"] += 1
+        scenario["times"].append(elapsed)
+        if verdict == expected:
+            scenario["correct"] += 1
+        elif verdict:
+            false_positives += 1
+        else:
+            false_negatives += 1
+
+    times = [elapsed for _, elapsed, _ in outcomes]
+    cpu = [cpu_time for _, _, cpu_time in outcomes]
+    correct = len(streams) - false_positives - false_negatives
+    return {
+        "probes": len(streams),
+        "accuracy": round(correct / len(streams), 4) if streams else 0.0,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+        "verdict_p50": round(percentile(times, 50), 3),
+        "verdict_p99": round(percentile(times, 99), 3),
+        "verdict_max": round(max(times, default=0.0), 3),
+        "cpu_ms_mean": round(1000 * sum(cpu) / len(cpu), 2) if cpu else 0.0,
+        "peak_rss_mb": round(monitor.peak_rss / (1024 * 1024), 1),
+        "rss_per_probe_kb": round((monitor.peak_rss - baseline_rss) / 1024 / max(1, min(concurrency, len(streams))), 1),
+        "scenarios": {
+            name: {
+                "expected": scenario["expected"],
+                "correct": scenario["correct"],
+                "total": scenario["total"],
+                "verdict_p50": round(percentile(scenario["times"], 50), 3),
+            }
+            for name, scenario in by_scenario.items()
+        },
+    }
+
+
+def hls_verdicts(result: Dict) -> Dict[str, Dict]:
+    """Per HLS scenario: whether it is playable and how often it was judged valid."""
+    return {
+        scenario: {
+            "playable": stats["expected"],
+            "judged_valid": stats["correct"] if stats["expected"] else stats["total"] - stats["correct"],
+            "total": stats["total"],
+        }
+        for scenario, stats in result["scenarios"].items()
+    }
+
+
+def print_report(name: str, result: Dict) -> None:
+    print_colored(
+        f"{name}: accuracy {result['accuracy']:.1%} ({result['false_positives']} false positives, "
+        f"{result['false_negatives']} false negatives), verdict p50 {result['verdict_p50']}s "
+        f"p99 {result['verdict_p99']}s, CPU {result['cpu_ms_mean']} ms/probe, "
+        f"peak RSS {result['peak_rss_mb']} MB (~{result['rss_per_probe_kb']} KB/probe)",
+        "cyan",
+    )
+    for scenario, stats in result["scenarios"].items():
+        color = "green" if stats["correct"] == stats["total"] else "yellow"
+        print_colored(f"    {scenario:<12} {stats['correct']}/{stats['total']} correct "
+                      f"(expected {'valid' if stats['expected'] else 'invalid'}), "
+                      f"verdict p50 {stats['verdict_p50']}s", color)
+    if "hls" in result:
+        print_colored("    HLS (not scored, only the playlist is downloaded):", "white")
+        for scenario, stats in result["hls"].items():
+            print_colored(f"    {scenario:<22} judged valid {stats['judged_valid']}/{stats['total']} "
+                          f"({'playable' if stats['playable'] else 'not playable'})", "white")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the stream validators on synthetic streams")
+    parser.add_argument("--streams", type=int, default=100)
+    parser.add_argument("--hls-streams", type=int, default=len(HLS_SCENARIOS),
+                        help="unscored HLS streams probed per validator (0 to skip)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, help="probe length passed to every validator")
+    parser.add_argument("--validators", default=",".join(VALIDATORS),
+                        help=f"comma-separated, from: {', '.join(VALIDATORS)}")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance)
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.validators.split(",") if name.strip()]
+    unknown = [name for name in names if name not in VALIDATORS]
+    if unknown:
+        parser.error(f"unknown validator(s): {', '.join(unknown)}")
+
+    port = free_port()
+    server = multiprocessing.Process(target=serve_streams, args=(port,), daemon=True)
+    server.start()
+    results = {}
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}"
+        streams = build_streams(base_url, args.streams)
+        hls_scenarios = [(name, "hls", options, playable) for name, options, playable in HLS_SCENARIOS]
+        hls_streams = build_streams(base_url, args.hls_streams, hls_scenarios)
+        for name in names:
+            results[name] = run_validator(VALIDATORS[name], streams, args.concurrency, args.duration)
+            if hls_streams:
+                hls = run_validator(VALIDATORS[name], hls_streams, args.concurrency, args.duration)
+                results[name]["hls"] = hls_verdicts(hls)
+            print_report(name, results[name])
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = [f"{name} {line}" for name in results if name in baseline
+                       for line in compare(results[name], baseline[name], args.tolerance, VALIDATOR_METRICS)]
+        if regressions:
+            for line in regressions:
+                print_colored(f"Regression: {line}", "red")
+            sys.exit(1)
+        print_colored("No regressions against baseline", "green")
+
+
+if __name__ == "__main__":
+    main()
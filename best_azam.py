@@ -2,13 +2,19 @@ import os
 import requests
 import time
 import json
+import re
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from playlist_scan import collect_entries, read_playlist_lines
+from channel_names import resolve_channel
 
 input_folder = 'specialiptvs'
 best_azam_channels_folder = 'best_channels'
 azam_json_output_file = os.path.join(best_azam_channels_folder, 'azam.json')
 
+# Same rule as match_azam_lines, as raw bytes for playlist_scan's memory-mapped scanner
+azam_pattern = re.compile(rb'AZAM', re.IGNORECASE)
+
 # Ensure the best_channels folder exists
 os.makedirs(best_azam_channels_folder, exist_ok=True)
 
@@ -40,14 +46,11 @@ def download_stream(url, duration=15):
 
 def extract_azam_entries(file_path):
     """Extract AZAM entries from an .m3u file"""
-    entries = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, 'r', encoding='iso-8859-1') as f:
-            lines = f.readlines()
+    return match_azam_lines(read_playlist_lines(file_path))
 
+def match_azam_lines(lines):
+    """Pick AZAM entries out of the lines of a playlist"""
+    entries = []
     for i in range(len(lines) - 1):
         if lines[i].startswith("#EXTINF") and "AZAM" in lines[i].upper():
             url = lines[i + 1].strip()
@@ -57,44 +60,11 @@ def extract_azam_entries(file_path):
 
 def get_channel_filename(channel_name):
     """Generate a filename for the channel based on its name."""
-    channel_mapping = {
-        "azam one hd": "azams_one_hd",
-        "azam two hd": "azams_two_hd",
-        "trace mziki": "trace_mziki",
-        "sinema zetu hd": "sinema_zetu_hd",
-    }
-    
-    for key, value in channel_mapping.items():
-        if key in channel_name.lower():
-            return value + '.m3u'
-    return None
-
-def main():
-    print("Searching for AZAM streams...")
-    azam_entries = []
-
-    # Step 1: Scan all files for AZAM entries
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.m3u'):
-            full_path = os.path.join(input_folder, file_name)
-            azam_entries.extend(extract_azam_entries(full_path))
-
-    print(f"Found {len(azam_entries)} AZAM entries. Checking which ones are valid...")
-
-    # Step 2: Validate entries concurrently
-    valid_streams = []
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in azam_entries}
-        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating AZAM streams"):
-            info, url = future_to_entry[future]
-            try:
-                if future.result():
-                    valid_streams.append((info, url))
-            except Exception as e:
-                print(f"Error checking stream: {e}")
+    channel_id = resolve_channel(channel_name, "azam")
+    return channel_id + '.m3u' if channel_id else None
 
-    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+def save_valid_streams(valid_streams):
+    """Save validated (info, url) pairs to the best_channels .m3u files and JSON"""
     if valid_streams:
         azam_json_data = {}
 
@@ -143,5 +113,28 @@ def main():
     else:
         print("\n❌ No valid AZAM streams found.")
 
+def main():
+    print("Searching for AZAM streams...")
+    # Step 1: Scan all files for AZAM entries, parsed in parallel
+    azam_entries = collect_entries(input_folder, azam_pattern)
+
+    print(f"Found {len(azam_entries)} AZAM entries. Checking which ones are valid...")
+
+    # Step 2: Validate entries concurrently
+    valid_streams = []
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in azam_entries}
+        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating AZAM streams"):
+            info, url = future_to_entry[future]
+            try:
+                if future.result():
+                    valid_streams.append((info, url))
+            except Exception as e:
+                print(f"Error checking stream: {e}")
+
+    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+    save_valid_streams(valid_streams)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
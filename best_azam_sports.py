@@ -2,13 +2,19 @@ import os
 import requests
 import time
 import json
+import re
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from playlist_scan import collect_entries, read_playlist_lines
+from channel_names import resolve_channel
 
 input_folder = 'specialiptvs'
 best_azam_channels_folder = 'best_channels'
 azam_sport_json_output_file = os.path.join(best_azam_channels_folder, 'azam_sport.json')
 
+# Same rule as match_azam_sport_lines, as raw bytes for playlist_scan's memory-mapped scanner
+azam_sport_pattern = re.compile(rb'AZAM SPORT', re.IGNORECASE)
+
 # Ensure the best_channels folder exists
 os.makedirs(best_azam_channels_folder, exist_ok=True)
 
@@ -40,14 +46,11 @@ def download_stream(url, duration=15):
 
 def extract_azam_sport_entries(file_path):
     """Extract AZAM SPORT-like entries from an .m3u file"""
-    entries = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, 'r', encoding='iso-8859-1') as f:
-            lines = f.readlines()
+    return match_azam_sport_lines(read_playlist_lines(file_path))
 
+def match_azam_sport_lines(lines):
+    """Pick AZAM SPORT entries out of the lines of a playlist"""
+    entries = []
     for i in range(len(lines) - 1):
         if lines[i].startswith("#EXTINF") and "AZAM SPORT" in lines[i].upper():
             url = lines[i + 1].strip()
@@ -57,64 +60,11 @@ def extract_azam_sport_entries(file_path):
 
 def get_channel_filename(channel_name):
     """Generate a filename for the channel based on its name."""
-    channel_mapping = {
-        "azam sport 1": "azam_sports_1_hd",
-        "azam sports 1": "azam_sports_1_hd",
-        "azam sport 2": "azam_sports_2_hd",
-        "azam sports 2": "azam_sports_2_hd",
-        "azam sport 3": "azam_sports_3_hd",
-        "azam sports 3": "azam_sports_3_hd",
-        "azam sport 4": "azam_sports_4_hd",
-        "azam sports 4": "azam_sports_4_hd",
-        "azam sport 5": "azam_sports_5_hd",
-        "azam sports 5": "azam_sports_5_hd",
-        "azam sport 6": "azam_sports_6_hd",
-        "azam sports 6": "azam_sports_6_hd",
-        "azam sport 7": "azam_sports_7_hd",
-        "azam sports 7": "azam_sports_7_hd",
-        "azam sport 8": "azam_sports_8_hd",
-        "azam sports 8": "azam_sports_8_hd",
-        "azam sport 9": "azam_sports_9_hd",
-        "azam sports 9": "azam_sports_9_hd",
-        "azam sport 10": "azam_sports_10_hd",
-        "azam sports 10": "azam_sports_10_hd",
-        "azam sport 11": "azam_sports_11_hd",
-        "azam sports 11": "azam_sports_11_hd",
-        "azam sport 12": "azam_sports_12_hd",
-        "azam sports 12": "azam_sports_12_hd",
-    }
-    
-    for key, value in channel_mapping.items():
-        if key in channel_name.lower():
-            return value + '.m3u'
-    return None
-
-def main():
-    print("Searching for AZAM SPORT streams...")
-    azam_sport_entries = []
-
-    # Step 1: Scan all files for AZAM_SPORT entries
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.m3u'):
-            full_path = os.path.join(input_folder, file_name)
-            azam_sport_entries.extend(extract_azam_sport_entries(full_path))
-
-    print(f"Found {len(azam_sport_entries)} AZAM SPORT entries. Checking which ones are valid...")
-
-    # Step 2: Validate entries concurrently
-    valid_streams = []
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in azam_sport_entries}
-        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating AZAM SPORT streams"):
-            info, url = future_to_entry[future]
-            try:
-                if future.result():
-                    valid_streams.append((info, url))
-            except Exception as e:
-                print(f"Error checking stream: {e}")
+    channel_id = resolve_channel(channel_name, "azam_sport")
+    return channel_id + '.m3u' if channel_id else None
 
-    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+def save_valid_streams(valid_streams):
+    """Save validated (info, url) pairs to the best_channels .m3u files and JSON"""
     if valid_streams:
         azam_sport_json_data = {}
 
@@ -162,5 +112,28 @@ def main():
     else:
         print("\n❌ No valid AZAM SPORT streams found.")
 
+def main():
+    print("Searching for AZAM SPORT streams...")
+    # Step 1: Scan all files for AZAM_SPORT entries, parsed in parallel
+    azam_sport_entries = collect_entries(input_folder, azam_sport_pattern)
+
+    print(f"Found {len(azam_sport_entries)} AZAM SPORT entries. Checking which ones are valid...")
+
+    # Step 2: Validate entries concurrently
+    valid_streams = []
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in azam_sport_entries}
+        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating AZAM SPORT streams"):
+            info, url = future_to_entry[future]
+            try:
+                if future.result():
+                    valid_streams.append((info, url))
+            except Exception as e:
+                print(f"Error checking stream: {e}")
+
+    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+    save_valid_streams(valid_streams)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
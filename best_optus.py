@@ -2,13 +2,19 @@ import os
 import requests
 import time
 import json
+import re
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from playlist_scan import collect_entries, read_playlist_lines
+from channel_names import resolve_channel
 
 input_folder = 'specialiptvs'
 best_optus_channels_folder = 'best_channels'
 optus_json_output_file = os.path.join(best_optus_channels_folder, 'optus.json')
 
+# Same rule as match_optus_lines, as raw bytes for playlist_scan's memory-mapped scanner
+optus_pattern = re.compile(rb'OPTUS [1-9]', re.IGNORECASE)
+
 # Ensure the best_channels folder exists
 os.makedirs(best_optus_channels_folder, exist_ok=True)
 
@@ -40,14 +46,11 @@ def download_stream(url, duration=15):
 
 def extract_optus_entries(file_path):
     """Extract OPTUS entries like Optus 1, Optus 2, etc."""
-    entries = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, 'r', encoding='iso-8859-1') as f:
-            lines = f.readlines()
+    return match_optus_lines(read_playlist_lines(file_path))
 
+def match_optus_lines(lines):
+    """Pick OPTUS entries out of the lines of a playlist"""
+    entries = []
     for i in range(len(lines) - 1):
         # Filter for lines containing 'Optus' followed by a number (e.g., 'Optus 1', 'Optus 2', etc.)
         if lines[i].startswith("#EXTINF") and "OPTUS" in lines[i].upper() and any(f"optus {n}" in lines[i].lower() for n in range(1, 13)):
@@ -58,52 +61,11 @@ def extract_optus_entries(file_path):
 
 def get_channel_filename(channel_name):
     """Generate a filename for the channel based on its name."""
-    channel_mapping = {
-        "optus 1 hd": "optus_1_hd",
-        "optus 2 hd": "optus_2_hd",
-        "optus 3": "optus_3_hd",
-        "optus 4": "optus_4_hd",
-        "optus 5": "optus_5_hd",
-        "optus 6": "optus_6_hd",
-        "optus 7": "optus_7_hd",
-        "optus 8": "optus_8_hd",
-        "optus 9": "optus_9_hd",
-        "optus 10": "optus_10_hd",
-        "optus 11": "optus_11_hd",
-        "optus 12": "optus_12_hd",
-    }
-    
-    for key, value in channel_mapping.items():
-        if key in channel_name.lower():
-            return value + '.m3u'
-    return None
-
-def main():
-    print("Searching for OPTUS channels...")
-    optus_entries = []
-
-    # Step 1: Scan all files for OPTUS entries (Optus 1, Optus 2, etc.)
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.m3u'):
-            full_path = os.path.join(input_folder, file_name)
-            optus_entries.extend(extract_optus_entries(full_path))
-
-    print(f"Found {len(optus_entries)} OPTUS entries. Checking which ones are valid...")
-
-    # Step 2: Validate entries concurrently
-    valid_streams = []
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in optus_entries}
-        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating OPTUS streams"):
-            info, url = future_to_entry[future]
-            try:
-                if future.result():
-                    valid_streams.append((info, url))
-            except Exception as e:
-                print(f"Error checking stream: {e}")
+    channel_id = resolve_channel(channel_name, "optus")
+    return channel_id + '.m3u' if channel_id else None
 
-    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+def save_valid_streams(valid_streams):
+    """Save validated (info, url) pairs to the best_channels .m3u files and JSON"""
     if valid_streams:
         optus_json_data = {}
 
@@ -152,5 +114,28 @@ def main():
     else:
         print("\n❌ No valid OPTUS streams found.")
 
+def main():
+    print("Searching for OPTUS channels...")
+    # Step 1: Scan all files for OPTUS entries (Optus 1, Optus 2, etc.), parsed in parallel
+    optus_entries = collect_entries(input_folder, optus_pattern)
+
+    print(f"Found {len(optus_entries)} OPTUS entries. Checking which ones are valid...")
+
+    # Step 2: Validate entries concurrently
+    valid_streams = []
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in optus_entries}
+        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating OPTUS streams"):
+            info, url = future_to_entry[future]
+            try:
+                if future.result():
+                    valid_streams.append((info, url))
+            except Exception as e:
+                print(f"Error checking stream: {e}")
+
+    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+    save_valid_streams(valid_streams)
+
 if __name__ == "__main__":
     main()
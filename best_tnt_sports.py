@@ -2,13 +2,19 @@ import os
 import requests
 import time
 import json
+import re
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from playlist_scan import collect_entries, read_playlist_lines
+from channel_names import resolve_channel
 
 input_folder = 'specialiptvs'
 best_tnt_channels_folder = 'best_channels'
 tnt_sport_json_output_file = os.path.join(best_tnt_channels_folder, 'tnt_sport.json')
 
+# Same rule as match_tnt_sport_lines, as raw bytes for playlist_scan's memory-mapped scanner
+tnt_sport_pattern = re.compile(rb'TNT SPORT', re.IGNORECASE)
+
 # Ensure the best_channels folder exists
 os.makedirs(best_tnt_channels_folder, exist_ok=True)
 
@@ -40,14 +46,11 @@ def download_stream(url, duration=15):
 
 def extract_tnt_sport_entries(file_path):
     """Extract TNT SPORT-like entries from an .m3u file"""
-    entries = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, 'r', encoding='iso-8859-1') as f:
-            lines = f.readlines()
+    return match_tnt_sport_lines(read_playlist_lines(file_path))
 
+def match_tnt_sport_lines(lines):
+    """Pick TNT SPORT entries out of the lines of a playlist"""
+    entries = []
     for i in range(len(lines) - 1):
         if lines[i].startswith("#EXTINF") and "TNT SPORT" in lines[i].upper():
             url = lines[i + 1].strip()
@@ -57,52 +60,11 @@ def extract_tnt_sport_entries(file_path):
 
 def get_channel_filename(channel_name):
     """Generate a filename for the channel based on its name."""
-    channel_mapping = {
-        "tnt sports 1 ": "tnt_sports_1_hd",
-        "tnt sports 2 ": "tnt_sports_2_hd",
-        "tnt sports 3 ": "tnt_sports_3_hd",
-        "tnt sports 4 ": "tnt_sports_4_hd",
-        "tnt sports 5 ": "tnt_sports_5_hd",
-        "tnt sports 6 ": "tnt_sports_6_hd",
-        "tnt sports 7 ": "tnt_sports_7_hd",
-        "tnt sports 8": "tnt_sports_8_hd",
-        "tnt sports 9": "tnt_sports_9_hd",
-        "tnt sports 10": "tnt_sports_10_hd",
-        "tnt sports 11": "tnt_sports_11_hd",
-        "tnt sports 12": "tnt_sports_12_hd",
-    }
-    
-    for key, value in channel_mapping.items():
-        if key in channel_name.lower():
-            return value + '.m3u'
-    return None
-
-def main():
-    print("Searching for TNT SPORT streams...")
-    tnt_sport_entries = []
-
-    # Step 1: Scan all files for TNT_SPORT entries
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.m3u'):
-            full_path = os.path.join(input_folder, file_name)
-            tnt_sport_entries.extend(extract_tnt_sport_entries(full_path))
-
-    print(f"Found {len(tnt_sport_entries)} TNT SPORT entries. Checking which ones are valid...")
-
-    # Step 2: Validate entries concurrently
-    valid_streams = []
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in tnt_sport_entries}
-        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating TNT SPORT streams"):
-            info, url = future_to_entry[future]
-            try:
-                if future.result():
-                    valid_streams.append((info, url))
-            except Exception as e:
-                print(f"Error checking stream: {e}")
+    channel_id = resolve_channel(channel_name, "tnt_sport")
+    return channel_id + '.m3u' if channel_id else None
 
-    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+def save_valid_streams(valid_streams):
+    """Save validated (info, url) pairs to the best_channels .m3u files and JSON"""
     if valid_streams:
         tnt_sport_json_data = {}
 
@@ -150,5 +112,28 @@ def main():
     else:
         print("\n❌ No valid TNT SPORT streams found.")
 
+def main():
+    print("Searching for TNT SPORT streams...")
+    # Step 1: Scan all files for TNT_SPORT entries, parsed in parallel
+    tnt_sport_entries = collect_entries(input_folder, tnt_sport_pattern)
+
+    print(f"Found {len(tnt_sport_entries)} TNT SPORT entries. Checking which ones are valid...")
+
+    # Step 2: Validate entries concurrently
+    valid_streams = []
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in tnt_sport_entries}
+        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating TNT SPORT streams"):
+            info, url = future_to_entry[future]
+            try:
+                if future.result():
+                    valid_streams.append((info, url))
+            except Exception as e:
+                print(f"Error checking stream: {e}")
+
+    # Step 3: Save valid streams to the appropriate .m3u files and JSON
+    save_valid_streams(valid_streams)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,13 +2,19 @@ import os
 import requests
 import time
 import json
+import re
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from playlist_scan import collect_entries, read_playlist_lines
+from channel_names import resolve_channel
 
 input_folder = 'specialiptvs'
 best_trace_channels_folder = 'best_channels'
 trace_json_output_file = os.path.join(best_trace_channels_folder, 'trace.json')
 
+# Same rule as match_trace_lines, as raw bytes for playlist_scan's memory-mapped scanner
+trace_pattern = re.compile(rb'TRACE', re.IGNORECASE)
+
 # Ensure the output folder exists
 os.makedirs(best_trace_channels_folder, exist_ok=True)
 
@@ -40,14 +46,11 @@ def download_stream(url, duration=15):
 
 def extract_trace_entries(file_path):
     """Extract all entries that contain 'TRACE'."""
-    entries = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, 'r', encoding='iso-8859-1') as f:
-            lines = f.readlines()
+    return match_trace_lines(read_playlist_lines(file_path))
 
+def match_trace_lines(lines):
+    """Pick TRACE entries out of the lines of a playlist"""
+    entries = []
     for i in range(len(lines) - 1):
         if lines[i].startswith("#EXTINF") and "TRACE" in lines[i].upper():
             url = lines[i + 1].strip()
@@ -57,53 +60,16 @@ def extract_trace_entries(file_path):
 
 def get_channel_filename(channel_name):
     """Generate a safe filename for the channel based on its name."""
-    channel_mapping = {
-        "trace mziki": "trace_mziki",
-        "trace urban": "trace_urban",
-        "trace caribbean": "trace_caribbean",
-        "trace tropical": "trace_tropical",
-        "trace gospel": "trace_gospel",
-        "trace africa": "trace_africa",
-        "trace latin": "trace_latin",
-        "trace naija": "trace_nigeria",
-    }
-
-    channel_name_lower = channel_name.lower()
-
-    for key, value in channel_mapping.items():
-        if key in channel_name_lower:
-            return value + '.m3u'
+    channel_id = resolve_channel(channel_name, "trace")
+    if channel_id:
+        return channel_id + '.m3u'
     
     # Fallback if no match: clean the name
-    fallback_name = channel_name_lower.replace(" ", "_").replace("/", "_").replace("\\", "_")
+    fallback_name = channel_name.lower().replace(" ", "_").replace("/", "_").replace("\\", "_")
     return fallback_name + '.m3u'
 
-def main():
-    print("🔎 Searching for TRACE channels...")
-    trace_entries = []
-
-    # Step 1: Scan all files for TRACE entries
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith('.m3u'):
-            full_path = os.path.join(input_folder, file_name)
-            trace_entries.extend(extract_trace_entries(full_path))
-
-    print(f"🎯 Found {len(trace_entries)} TRACE entries. Validating streams...")
-
-    # Step 2: Validate entries concurrently
-    valid_streams = []
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in trace_entries}
-        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating TRACE streams"):
-            info, url = future_to_entry[future]
-            try:
-                if future.result():
-                    valid_streams.append((info, url))
-            except Exception as e:
-                print(f"⚠️ Error checking stream: {e}")
-
-    # Step 3: Save valid streams into files and JSON
+def save_valid_streams(valid_streams):
+    """Save validated (info, url) pairs to the best_channels .m3u files and JSON"""
     if valid_streams:
         trace_json_data = {}
         channel_streams = {}
@@ -153,5 +119,28 @@ def main():
     else:
         print("\n❌ No valid TRACE streams found.")
 
+def main():
+    print("🔎 Searching for TRACE channels...")
+    # Step 1: Scan all files for TRACE entries, parsed in parallel
+    trace_entries = collect_entries(input_folder, trace_pattern)
+
+    print(f"🎯 Found {len(trace_entries)} TRACE entries. Validating streams...")
+
+    # Step 2: Validate entries concurrently
+    valid_streams = []
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        future_to_entry = {executor.submit(download_stream, url): (info, url) for info, url in trace_entries}
+        for future in tqdm(as_completed(future_to_entry), total=len(future_to_entry), desc="Validating TRACE streams"):
+            info, url = future_to_entry[future]
+            try:
+                if future.result():
+                    valid_streams.append((info, url))
+            except Exception as e:
+                print(f"⚠️ Error checking stream: {e}")
+
+    # Step 3: Save valid streams into files and JSON
+    save_valid_streams(valid_streams)
+
 if __name__ == "__main__":
     main()
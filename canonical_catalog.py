@@ -0,0 +1,281 @@
+"""
+Canonical channel catalog built from every harvested playlist.
+
+The same channel shows up under many spellings across the MACn.m3u files
+("Azam Sports 1 HD", "|TZ| AZAM SPORT 1 ᴴᴰ", "azam sports 1 fhd"). Entries are
+grouped by their normalized name (channel_names.normalize_name), then the
+distinct names are split into blocks that share a first word and the same
+numbers, and only names within a block are compared. Names scoring at least
+similarity_threshold are merged, so the work stays close to linear in the
+number of distinct names instead of comparing every pair.
+
+Each cluster becomes one canonical channel. Channels the best_*.py mappings
+know keep their ids (e.g. "azam_sports_1_hd"); others get a slug of their most
+common name. The output maps canonical ids to their mirror URLs:
+
+    {"channels": {"azam_sports_1_hd": {"name": ..., "aliases": [...],
+                                       "groups": [...], "sources": 12,
+                                       "urls": [...]}}}
+
+    python canonical_catalog.py
+    python canonical_catalog.py --source specialiptvs --output canonical_channels.json
+"""
+
+import os
+import re
+import json
+import argparse
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import hotrun
+from channel_names import normalize_name, resolve_channel
+from channel_snapshot import Snapshot, parse_extinf
+from playlist_scan import playlist_paths, read_playlist_lines
+
+input_folder = "specialiptvs"
+catalog_file = "canonical_channels.json"
+
+similarity_threshold = 0.85
+# Every word of the shorter name needs a counterpart at least this close (catches "one" vs "two")
+token_threshold = 0.75
+# Blocks larger than this are split again on the next word
+max_block_size = 50
+# Spellings and groups kept per channel in the output
+max_aliases = 20
+
+
+class NameStats:
+    """Everything collected for one normalized name."""
+
+    __slots__ = ("count", "spellings", "groups", "urls", "files")
+
+    def __init__(self):
+        self.count = 0
+        self.spellings: Counter = Counter()
+        self.groups: Counter = Counter()
+        self.urls: Dict[str, None] = {}  # insertion-ordered set
+        self.files = set()
+
+
+def iter_entries(folder: str = input_folder,
+                 snapshot_path: Optional[str] = None) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Every harvested channel as (file, name, group, url).
+    Reads the folder's channel snapshot when one exists, otherwise parses the .m3u files.
+    """
+    snapshot_path = snapshot_path or os.path.join(folder, os.path.basename(hotrun.snapshot_file))
+    if os.path.exists(snapshot_path):
+        with Snapshot(snapshot_path) as snapshot:
+            for row in range(len(snapshot)):
+                channel = snapshot.channel(row)
+                yield channel.file, channel.name, channel.group, channel.url
+        return
+
+    for file_path in playlist_paths(folder):
+        lines = read_playlist_lines(file_path)
+        file_name = os.path.basename(file_path)
+        for i in range(len(lines) - 1):
+            if lines[i].startswith("#EXTINF"):
+                url = lines[i + 1].strip()
+                if url.startswith("http"):
+                    name, group, _ = parse_extinf(lines[i])
+                    yield file_name, name, group, url
+
+
+def block_key(name: str, depth: int = 1) -> Tuple[str, ...]:
+    """First words of a name plus all of its numbers; "sport 1" and "sport 2" never share a block."""
+    tokens = name.split()
+    numbers = tuple(token for token in tokens if token.isdigit())
+    words = tuple(token for token in tokens if not token.isdigit())[:depth]
+    return words + ("#",) + numbers
+
+
+class _UnionFind:
+    def __init__(self, items: List[str]):
+        self.parent = {item: item for item in items}
+
+    def find(self, item: str) -> str:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+
+def tokens_match(a: str, b: str) -> bool:
+    shorter, longer = sorted((a.split(), b.split()), key=len)
+    for token in shorter:
+        if token in longer:
+            continue
+        if not any(SequenceMatcher(None, token, other).ratio() >= token_threshold for other in longer):
+            return False
+    return True
+
+
+def compare_block(block: List[str], union: _UnionFind, merge) -> None:
+    """Merge similar names within a block, skipping pairs whose lengths alone rule them out."""
+    block.sort(key=len)
+    for i, a in enumerate(block):
+        # ratio() is at most 2 * len(a) / (len(a) + len(b)), so longer names can't reach the threshold
+        max_len = len(a) * (2 - similarity_threshold) / similarity_threshold
+        matcher = SequenceMatcher(None, b=a, autojunk=False)
+        for b in block[i + 1:]:
+            if len(b) > max_len:
+                break
+            if union.find(a) == union.find(b):
+                continue
+            matcher.set_seq1(b)
+            if (matcher.quick_ratio() >= similarity_threshold and matcher.ratio() >= similarity_threshold
+                    and tokens_match(a, b)):
+                merge(a, b)
+
+
+def cluster_names(names: List[str], known_ids: Dict[str, Optional[str]]) -> List[List[str]]:
+    """
+    Group normalized names that refer to the same channel.
+    Args:
+        names: Distinct normalized names
+        known_ids: Name -> id from channel_names, or None; names with the same id always merge
+            and clusters with different ids never do
+    Returns:
+        Clusters of names
+    """
+    union = _UnionFind(names)
+    # Known id of each cluster, kept on its root
+    cluster_ids: Dict[str, Optional[str]] = dict(known_ids)
+
+    def merge(a: str, b: str) -> None:
+        root_a, root_b = union.find(a), union.find(b)
+        if root_a == root_b:
+            return
+        id_a, id_b = cluster_ids[root_a], cluster_ids[root_b]
+        if id_a and id_b and id_a != id_b:
+            return
+        union.parent[root_b] = root_a
+        cluster_ids[root_a] = id_a or id_b
+
+    first_with_id: Dict[str, str] = {}
+    for name in names:
+        channel_id = known_ids[name]
+        if channel_id:
+            merge(first_with_id.setdefault(channel_id, name), name)
+
+    pending = [(1, names)]
+    while pending:
+        depth, group = pending.pop()
+        blocks: Dict[Tuple[str, ...], List[str]] = {}
+        for name in group:
+            blocks.setdefault(block_key(name, depth), []).append(name)
+        for block in blocks.values():
+            if len(block) > max_block_size and depth < 3:
+                pending.append((depth + 1, block))
+                continue
+            compare_block(block, union, merge)
+
+    clusters: Dict[str, List[str]] = {}
+    for name in names:
+        clusters.setdefault(union.find(name), []).append(name)
+    return list(clusters.values())
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "channel"
+
+
+def build_catalog(entries: Iterator[Tuple[str, str, str, str]]) -> Dict[str, Dict]:
+    """
+    Cluster harvested entries into canonical channels.
+    Args:
+        entries: (file, name, group, url) tuples, e.g. from iter_entries()
+    Returns:
+        Canonical id -> {"name", "aliases", "groups", "sources", "urls"}
+    """
+    stats: Dict[str, NameStats] = {}
+    for file_name, name, group, url in entries:
+        normalized = normalize_name(name)
+        if not normalized:
+            continue
+        item = stats.get(normalized)
+        if item is None:
+            item = stats[normalized] = NameStats()
+        item.count += 1
+        item.spellings[name] += 1
+        if group:
+            item.groups[group] += 1
+        item.urls[url] = None
+        item.files.add(file_name)
+
+    names = sorted(stats)
+    known_ids = {name: resolve_channel(name) for name in names}
+
+    catalog: Dict[str, Dict] = {}
+    for cluster in cluster_names(names, known_ids):
+        cluster.sort(key=lambda name: stats[name].count, reverse=True)
+        channel_id = next((known_ids[name] for name in cluster if known_ids[name]), None) or slug(cluster[0])
+        if channel_id in catalog:
+            # Two unrelated clusters can slug to the same id
+            suffix = 2
+            while f"{channel_id}_{suffix}" in catalog:
+                suffix += 1
+            channel_id = f"{channel_id}_{suffix}"
+
+        spellings: Counter = Counter()
+        groups: Counter = Counter()
+        urls: Dict[str, None] = {}
+        files = set()
+        for name in cluster:
+            spellings.update(stats[name].spellings)
+            groups.update(stats[name].groups)
+            urls.update(stats[name].urls)
+            files |= stats[name].files
+
+        catalog[channel_id] = {
+            "name": spellings.most_common(1)[0][0],
+            "aliases": [spelling for spelling, _ in spellings.most_common(max_aliases)],
+            "groups": [group for group, _ in groups.most_common(max_aliases)],
+            "sources": len(files),
+            "urls": list(urls),
+        }
+    return catalog
+
+
+def save_catalog(catalog: Dict[str, Dict], path: str = catalog_file) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"channels": catalog}, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_catalog(path: str = catalog_file) -> Dict[str, Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("channels", {})
+
+
+def mirror_urls(catalog: Dict[str, Dict], channel_name: str) -> List[str]:
+    """Mirror URLs for a canonical id, or for any name that resolves to one."""
+    channel = catalog.get(channel_name)
+    if channel is None:
+        channel_id = resolve_channel(channel_name) or slug(normalize_name(channel_name))
+        channel = catalog.get(channel_id, {})
+    return list(channel.get("urls", []))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cluster harvested channels into a canonical catalog")
+    parser.add_argument("--source", default=input_folder, help="folder of MACn.m3u files")
+    parser.add_argument("--snapshot", help="channel snapshot to read (default: channels.snap in --source)")
+    parser.add_argument("--output", default=catalog_file)
+    args = parser.parse_args()
+
+    catalog = build_catalog(iter_entries(args.source, args.snapshot))
+    save_catalog(catalog, args.output)
+    mirrors = sum(len(channel["urls"]) for channel in catalog.values())
+    hotrun.print_colored(f"✅ {len(catalog)} canonical channels with {mirrors} mirror URLs written to {args.output}",
+                         "green")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+In-memory catalog of the validated channels in best_channels/*.json.
+
+Every response the API can give (the full list, each group, each channel) is
+serialized, gzipped and hashed once when the files are loaded, so serving a
+request is a dictionary lookup. The folder is re-checked for changes at most
+every check_interval seconds, and only reloaded when a file's mtime or size
+changed.
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+channels_folder = "best_channels"
+check_interval = 5  # seconds between mtime checks
+
+
+class Payload:
+    """A pre-serialized JSON response with its gzip body and ETag."""
+
+    __slots__ = ("body", "gzip_body", "etag")
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=6)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+
+
+class ChannelCatalog:
+    """Channels keyed by id, reloaded from disk when the JSON files change."""
+
+    def __init__(self, folder: str = channels_folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.signature: Optional[Tuple] = None
+        self.next_check = 0.0
+        self.channels: Dict[str, Dict] = {}
+        # A channel can appear in several brand files (trace_mziki is in azam and trace);
+        # its stream URLs from all of them, in file order
+        self.urls: Dict[str, List[str]] = {}
+        self.empty_payload = Payload({"channels": {}})
+        self.all_payload = self.empty_payload
+        self.channel_payloads: Dict[str, Payload] = {}
+        self.group_payloads: Dict[str, Payload] = {}
+
+    def _signature(self) -> Tuple:
+        entries = []
+        if os.path.isdir(self.folder):
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(entries))
+
+    def _load(self, signature: Tuple) -> None:
+        channels = {}
+        urls: Dict[str, List[str]] = {}
+        for file_name, _, _ in signature:
+            try:
+                with open(os.path.join(self.folder, file_name), "r", encoding="utf-8") as f:
+                    file_channels = json.load(f).get("channels", {})
+            except (OSError, ValueError) as e:
+                print(f"Error reading {file_name}: {e}")
+                continue
+            channels.update(file_channels)
+            for channel_id, info in file_channels.items():
+                stream_urls = info.get("streamUrl", [])
+                merged = urls.setdefault(channel_id, [])
+                for url in [stream_urls] if isinstance(stream_urls, str) else stream_urls:
+                    if url not in merged:
+                        merged.append(url)
+
+        groups: Dict[str, Dict[str, Dict]] = {}
+        for channel_id, info in channels.items():
+            groups.setdefault(str(info.get("groupName", "")).lower(), {})[channel_id] = info
+
+        self.channels = channels
+        self.urls = urls
+        self.all_payload = Payload({"channels": channels})
+        self.channel_payloads = {channel_id: Payload(dict(info, id=channel_id)) for channel_id, info in channels.items()}
+        self.group_payloads = {group: Payload({"channels": members}) for group, members in groups.items()}
+        self.signature = signature
+
+    def refresh(self) -> None:
+        """Reload if the files changed, checking the folder at most every check_interval seconds."""
+        now = time.time()
+        if now < self.next_check:
+            return
+        with self.lock:
+            if now < self.next_check:
+                return
+            self.next_check = now + check_interval
+            signature = self._signature()
+            if signature != self.signature:
+                self._load(signature)
+
+    def get(self, channel_id: str) -> Optional[Dict]:
+        self.refresh()
+        return self.channels.get(channel_id)
+
+    def stream_urls(self, channel_id: str) -> List[str]:
+        """Validated stream URLs for a channel from every file that lists it (empty if unknown)."""
+        self.refresh()
+        return list(self.urls.get(channel_id, []))
+
+    def all(self) -> Payload:
+        self.refresh()
+        return self.all_payload
+
+    def channel(self, channel_id: str) -> Optional[Payload]:
+        self.refresh()
+        return self.channel_payloads.get(channel_id)
+
+    def group(self, group_name: str) -> Payload:
+        self.refresh()
+        return self.group_payloads.get(group_name.lower(), self.empty_payload)
+
+
+catalog = ChannelCatalog()
@@ -0,0 +1,114 @@
+"""
+Shared channel-name resolver for the best_*.py scripts and azam_xmltv.py.
+
+Names are normalized first (Unicode compatibility forms, case, punctuation,
+quality tags such as HD/FHD/ᴴᴰ and country prefixes such as "TZ:" or "|AF|"),
+then matched against every key of a brand with one precompiled regex. Keys
+are tried longest first and must end on a word boundary, so "azam sport 1"
+no longer matches "Azam Sport 10". A trailing "+" counts as a boundary
+("Azam Sport 1+" is Azam Sport 1), a "+" inside a word does not.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Channel ids per brand: name key -> channel id (the best_channels/<id>.m3u file name)
+BRAND_CHANNELS: Dict[str, Dict[str, str]] = {
+    "azam": {
+        "azam one hd": "azams_one_hd",
+        "azam two hd": "azams_two_hd",
+        "trace mziki": "trace_mziki",
+        "sinema zetu hd": "sinema_zetu_hd",
+    },
+    "azam_sport": {
+        **{f"azam sport {n}": f"azam_sports_{n}_hd" for n in range(1, 13)},
+        **{f"azam sports {n}": f"azam_sports_{n}_hd" for n in range(1, 13)},
+    },
+    "trace": {
+        "trace mziki": "trace_mziki",
+        "trace urban": "trace_urban",
+        "trace caribbean": "trace_caribbean",
+        "trace tropical": "trace_tropical",
+        "trace gospel": "trace_gospel",
+        "trace africa": "trace_africa",
+        "trace latin": "trace_latin",
+        "trace naija": "trace_nigeria",
+    },
+    "optus": {f"optus {n}": f"optus_{n}_hd" for n in range(1, 13)},
+    "tnt_sport": {f"tnt sports {n}": f"tnt_sports_{n}_hd" for n in range(1, 13)},
+}
+
+# Quality and codec tags dropped from names
+QUALITY_TAGS = {"hd", "fhd", "uhd", "sd", "hq", "4k", "8k", "hevc", "h264", "h265", "raw", "50fps", "60fps"}
+
+# Country prefixes can be stacked ("AF | TZ: ...")
+_country_prefix_re = re.compile(r"^(?:\s*(?:[\[(|]\s*[a-z]{2,3}\s*[\])|]|[a-z]{2,3}\s*[:|]|[a-z]{2,3}\s+-)\s*)+")
+_glued_tag_re = re.compile(r"(?<=\d)(?=(?:fhd|uhd|hd|sd)\b)")
+# Runs of letters, digits and "+"; everything else, including "_", separates tokens
+_token_re = re.compile(r"(?:[^\W_]|\+)+")
+
+
+def fold_name(channel_name: str) -> str:
+    """Unicode compatibility forms and case folded away; the first step of normalize_name."""
+    if channel_name.isascii():
+        # Nothing for NFKC to fold, and casefold() is lower() for ASCII
+        return channel_name.lower()
+    return unicodedata.normalize("NFKC", channel_name).casefold()
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(channel_name: str) -> str:
+    """
+    Normalize a channel name for matching.
+    "|TZ| Azam Sports 1 ᴴᴰ" and "azam-sports-1 FHD" both become "azam sports 1".
+    """
+    name = _country_prefix_re.sub("", fold_name(channel_name), count=1)
+    if "hd" in name or "sd" in name:
+        name = _glued_tag_re.sub(" ", name)
+    return " ".join([token for token in _token_re.findall(name) if token not in QUALITY_TAGS])
+
+
+class ChannelResolver:
+    """Maps channel names to ids with a single longest-match regex over normalized keys."""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.ids: Dict[str, str] = {}
+        for key, channel_id in mapping.items():
+            self.ids.setdefault(normalize_name(key), channel_id)
+        # Longest keys first, so the regex prefers "azam sports 10" over "azam sports 1"
+        keys = sorted(self.ids, key=len, reverse=True)
+        alternation = "|".join(re.escape(key) for key in keys) or "(?!)"
+        self.pattern = re.compile(rf"(?<![\w+])(?:{alternation})(?!\w|\+\w)")
+        # Normalizing only drops and separates characters, so a name can only match
+        # if its folded form contains the first word of some key
+        self.first_words = tuple({key.split()[0] for key in keys})
+        # The same names recur in every harvested playlist
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+
+    def _resolve(self, channel_name: str) -> Optional[str]:
+        """Channel id for a name, or None if no key matches."""
+        folded = fold_name(channel_name)
+        if not any(word in folded for word in self.first_words):
+            return None
+        match = self.pattern.search(normalize_name(channel_name))
+        return self.ids[match.group(0)] if match else None
+
+
+resolvers: Dict[str, ChannelResolver] = {brand: ChannelResolver(mapping) for brand, mapping in BRAND_CHANNELS.items()}
+all_channels = ChannelResolver({key: channel_id for mapping in BRAND_CHANNELS.values()
+                                for key, channel_id in mapping.items()})
+
+
+def resolve_channel(channel_name: str, brand: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve a channel name to its id.
+    Args:
+        channel_name: Name from an #EXTINF line or the EPG
+        brand: Restrict to one brand's channels ("azam", "azam_sport", "trace", "optus", "tnt_sport")
+    Returns:
+        Channel id such as "azam_sports_1_hd", or None
+    """
+    resolver = all_channels if brand is None else resolvers[brand]
+    return resolver.resolve(channel_name)
@@ -0,0 +1,346 @@
+"""
+Compact columnar snapshot of a harvested channel corpus.
+
+hotrun.py writes one snapshot next to the MACn.m3u files so downstream tools
+can load every harvested channel without re-parsing thousands of playlists.
+Names, groups, hosts, logos and file names are interned in one string table;
+URLs live in their own blob addressed by an offset array; every channel is a
+row in fixed-width uint32 columns. For the name, group and host columns the
+rows are also stored grouped by string id, so a substring query is a regex
+over the (small) string table followed by array slices.
+
+The file is memory-mapped and its sections are used in place, so opening a
+snapshot costs a few milliseconds regardless of its size.
+
+    python channel_snapshot.py convert specialiptvs specialiptvs/channels.snap
+    python channel_snapshot.py query specialiptvs/channels.snap --group sport --name azam
+"""
+
+import io
+import os
+import re
+import sys
+import mmap
+import struct
+import argparse
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"PAIXSNAP"
+VERSION = 1
+
+# Section name -> array typecode, in file order
+SECTIONS = [
+    ("string_offsets", "I"),
+    ("string_blob", "B"),
+    ("url_offsets", "Q"),
+    ("url_blob", "B"),
+    ("file", "I"),
+    ("name", "I"),
+    ("group", "I"),
+    ("host", "I"),
+    ("logo", "I"),
+    ("name_starts", "I"),
+    ("name_rows", "I"),
+    ("group_starts", "I"),
+    ("group_rows", "I"),
+    ("host_starts", "I"),
+    ("host_rows", "I"),
+]
+INDEXED_COLUMNS = ("name", "group", "host")
+
+HEADER = struct.Struct("<8sIII")  # magic, version, string count, row count
+SECTION_ENTRY = struct.Struct("<QQ")  # offset, length in bytes
+
+_attribute_re = re.compile(r'([\w-]+)="([^"]*)"')
+_extinf_name_re = re.compile(r'^#EXTINF:[^,"]*(?:"[^"]*"[^,"]*)*,(.*)$')
+
+
+class SnapshotChannel(NamedTuple):
+    file: str
+    name: str
+    group: str
+    host: str
+    logo: str
+    url: str
+
+    @property
+    def extinf(self) -> str:
+        """The #EXTINF line in the format hotrun.py writes."""
+        return f'#EXTINF:-1 tvg-logo="{self.logo}" group-title="{self.group}",{self.name}'
+
+
+def parse_extinf(extinf: str) -> Tuple[str, str, str]:
+    """
+    Split an #EXTINF line into its parts.
+    Returns:
+        (name, group-title, tvg-logo); missing attributes are empty strings
+    """
+    extinf = extinf.strip()
+    attributes = dict(_attribute_re.findall(extinf))
+    match = _extinf_name_re.match(extinf)
+    name = match.group(1).strip() if match else extinf.split(",", 1)[-1].strip()
+    return name, attributes.get("group-title", ""), attributes.get("tvg-logo", "")
+
+
+def url_host(url: str) -> str:
+    parts = url.split("/", 3)
+    return parts[2] if len(parts) > 2 and "://" in url else ""
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class SnapshotWriter:
+    """Collects channels from playlists and writes them as one snapshot file."""
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.string_offsets = array("I", [0])
+        self.string_blob = bytearray()
+        self.url_offsets = array("Q", [0])
+        self.url_blob = bytearray()
+        self.columns = {column: array("I") for column in ("file", "name", "group", "host", "logo")}
+
+    def __len__(self) -> int:
+        return len(self.columns["file"])
+
+    def intern(self, text: str) -> int:
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = self.strings[text] = len(self.strings)
+            # A NUL between strings keeps substring matches from running across two of them
+            self.string_blob += text.encode("utf-8") + b"\0"
+            self.string_offsets.append(len(self.string_blob))
+        return string_id
+
+    def add_channel(self, file_name: str, name: str, group: str, logo: str, url: str) -> None:
+        self.columns["file"].append(self.intern(file_name))
+        self.columns["name"].append(self.intern(name))
+        self.columns["group"].append(self.intern(group))
+        self.columns["host"].append(self.intern(url_host(url)))
+        self.columns["logo"].append(self.intern(logo))
+        self.url_blob += url.encode("utf-8")
+        self.url_offsets.append(len(self.url_blob))
+
+    def add_playlist(self, file_name: str, entries: Iterable[Tuple[str, str]]) -> None:
+        """Add (#EXTINF line, url) entries, e.g. the ones hotrun.process_mac returns."""
+        for extinf, url in entries:
+            name, group, logo = parse_extinf(extinf)
+            self.add_channel(file_name, name, group, logo, url.strip())
+
+    def add_lines(self, file_name: str, lines: List[str]) -> None:
+        """Add the entries of an M3U file given as lines."""
+        entries = []
+        for i in range(len(lines) - 1):
+            if lines[i].startswith("#EXTINF"):
+                url = lines[i + 1].strip()
+                if url and not url.startswith("#"):
+                    entries.append((lines[i], url))
+        self.add_playlist(file_name, entries)
+
+    def _postings(self, column: array) -> Tuple[array, array]:
+        """Rows grouped by string id: rows[starts[id]:starts[id + 1]] in row order."""
+        starts = array("I", bytes(4 * (len(self.strings) + 1)))
+        for string_id in column:
+            starts[string_id + 1] += 1
+        for i in range(len(self.strings)):
+            starts[i + 1] += starts[i]
+        rows = array("I", bytes(4 * len(column)))
+        fill = array("I", starts)
+        for row, string_id in enumerate(column):
+            rows[fill[string_id]] = row
+            fill[string_id] += 1
+        return starts, rows
+
+    def write(self, path: str) -> None:
+        """Write the snapshot atomically."""
+        sections = {
+            "string_offsets": self.string_offsets,
+            "string_blob": self.string_blob,
+            "url_offsets": self.url_offsets,
+            "url_blob": self.url_blob,
+        }
+        sections.update(self.columns)
+        for column in INDEXED_COLUMNS:
+            sections[f"{column}_starts"], sections[f"{column}_rows"] = self._postings(self.columns[column])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            position = HEADER.size + SECTION_ENTRY.size * len(SECTIONS)
+            table = []
+            for name, _ in SECTIONS:
+                data = sections[name]
+                length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+                position += -position % 8  # keep every section 8-byte aligned
+                table.append((position, length))
+                position += length
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.strings), len(self)))
+            for offset, length in table:
+                f.write(SECTION_ENTRY.pack(offset, length))
+            for (name, _), (offset, _) in zip(SECTIONS, table):
+                f.write(b"\0" * (offset - f.tell()))
+                data = sections[name]
+                f.write(_to_little_endian(data).tobytes() if isinstance(data, array) else data)
+        os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.string_count, self.row_count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} channel snapshot")
+        self.sections = {}
+        view = memoryview(self.mm)
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(self.mm, HEADER.size + SECTION_ENTRY.size * i)
+            section = view[offset:offset + length]
+            if typecode != "B":
+                if sys.byteorder == "little":
+                    section = section.cast(typecode)
+                else:
+                    section = array(typecode, bytes(section))
+                    section.byteswap()
+            self.sections[name] = section
+
+    def close(self) -> None:
+        self.sections = {}
+        self.mm.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def string(self, string_id: int) -> str:
+        offsets = self.sections["string_offsets"]
+        # Each string is followed by a NUL separator
+        return bytes(self.sections["string_blob"][offsets[string_id]:offsets[string_id + 1] - 1]).decode("utf-8")
+
+    def url(self, row: int) -> str:
+        offsets = self.sections["url_offsets"]
+        return bytes(self.sections["url_blob"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def channel(self, row: int) -> SnapshotChannel:
+        s = self.sections
+        return SnapshotChannel(
+            self.string(s["file"][row]),
+            self.string(s["name"][row]),
+            self.string(s["group"][row]),
+            self.string(s["host"][row]),
+            self.string(s["logo"][row]),
+            self.url(row),
+        )
+
+    def channels(self, rows: Iterable[int]) -> List[SnapshotChannel]:
+        return [self.channel(row) for row in rows]
+
+    def matching_strings(self, text: str) -> List[int]:
+        """Ids of interned strings containing text (case-insensitive for ASCII)."""
+        pattern = re.compile(re.escape(text.encode("utf-8")), re.IGNORECASE)
+        offsets = self.sections["string_offsets"]
+        ids = []
+        for match in pattern.finditer(self.sections["string_blob"]):
+            string_id = bisect_right(offsets, match.start()) - 1
+            if not ids or ids[-1] != string_id:
+                ids.append(string_id)
+        return ids
+
+    def rows_with(self, column: str, text: str) -> List[int]:
+        """Rows whose name, group or host contains text, in row order."""
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"Column {column!r} is not indexed")
+        starts = self.sections[f"{column}_starts"]
+        rows = self.sections[f"{column}_rows"]
+        found = []
+        for string_id in self.matching_strings(text):
+            found.extend(rows[starts[string_id]:starts[string_id + 1]])
+        found.sort()
+        return found
+
+    def find(self, name: Optional[str] = None, group: Optional[str] = None,
+             host: Optional[str] = None) -> List[int]:
+        """
+        Rows matching every given substring.
+        Args:
+            name: Substring of the channel name
+            group: Substring of the group title
+            host: Substring of the stream host
+        Returns:
+            Matching row numbers in row order (all rows if no filter is given)
+        """
+        result = None
+        for column, text in (("name", name), ("group", group), ("host", host)):
+            if text is None:
+                continue
+            rows = self.rows_with(column, text)
+            result = rows if result is None else sorted(set(result).intersection(rows))
+        return list(range(self.row_count)) if result is None else result
+
+
+def convert_folder(folder: str, path: str) -> int:
+    """
+    Build a snapshot from the .m3u files in a folder.
+    Returns:
+        Number of channels written
+    """
+    writer = SnapshotWriter()
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.endswith(".m3u"):
+            with open(os.path.join(folder, file_name), "rb") as f:
+                data = f.read()
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                text = data.decode("iso-8859-1")
+            writer.add_lines(file_name, io.StringIO(text, newline=None).readlines())
+    writer.write(path)
+    return len(writer)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query a channel snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="build a snapshot from a folder of .m3u files")
+    convert.add_argument("folder")
+    convert.add_argument("output")
+    query = commands.add_parser("query", help="list channels matching substrings")
+    query.add_argument("snapshot")
+    query.add_argument("--name")
+    query.add_argument("--group")
+    query.add_argument("--host")
+    query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert_folder(args.folder, args.output)
+        print(f"✅ {count} channels written to {args.output}")
+        return
+
+    with Snapshot(args.snapshot) as snapshot:
+        rows = snapshot.find(args.name, args.group, args.host)
+        for channel in snapshot.channels(rows[:args.limit]):
+            print(f"{channel.file}\t{channel.group}\t{channel.name}\t{channel.url}")
+        print(f"{len(rows)} of {len(snapshot)} channels matched")
+
+
+if __name__ == "__main__":
+    main()
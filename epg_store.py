@@ -0,0 +1,139 @@
+"""
+In-memory EPG store with time-range queries.
+
+Programs are indexed per channel and globally by start time. Because every
+program's length is bounded by the longest one loaded, an overlap query only
+has to look at programs starting in [start - longest, end), which makes
+"what's on now" and "live events in the next N hours" a couple of bisects
+instead of a scan over the whole schedule.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# Azam schedules use East Africa Time without an offset in the timestamps
+epg_timezone = timezone(timedelta(hours=3))
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def epg_now() -> datetime:
+    """Current time in the EPG's (naive) local time."""
+    return datetime.now(epg_timezone).replace(tzinfo=None)
+
+
+def is_live_title(title: str) -> bool:
+    return "live" in title.lower()
+
+
+class _Index:
+    """Programs sorted by start time, with the longest duration for overlap queries."""
+
+    def __init__(self, programs: List[Dict[str, Any]]):
+        self.programs = sorted(programs, key=lambda p: p["_start"])
+        self.starts = [p["_start"] for p in self.programs]
+        self.longest = max((p["_end"] - p["_start"] for p in self.programs), default=timedelta(0))
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        lo = bisect_left(self.starts, start - self.longest)
+        hi = bisect_left(self.starts, end)
+        return [p for p in self.programs[lo:hi] if p["_end"] > start]
+
+    def at(self, moment: datetime) -> Optional[Dict[str, Any]]:
+        """Latest program that started at or before moment and is still running."""
+        i = bisect_right(self.starts, moment)
+        # Programs on one channel normally don't overlap, so the nearest start wins;
+        # look a little further back in case the schedule has overlaps.
+        for program in reversed(self.programs[max(0, i - 4):i]):
+            if program["_end"] > moment:
+                return program
+        return None
+
+
+class EpgStore:
+    """Programs from azam_epg.py indexed by channel and by start/end time."""
+
+    def __init__(self, program_details: List[Dict[str, Any]]):
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        programs = []
+        for program in program_details:
+            if not isinstance(program, dict):
+                continue
+            try:
+                start = datetime.strptime(program["since"], TIME_FORMAT)
+                end = datetime.strptime(program["till"], TIME_FORMAT)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if end <= start:
+                # Programs running past midnight are sometimes stored with an earlier "till"
+                end += timedelta(days=1)
+            indexed = dict(program, _start=start, _end=end)
+            programs.append(indexed)
+            by_channel.setdefault(program.get("channel_name") or "", []).append(indexed)
+
+        self.all = _Index(programs)
+        self.live = _Index([p for p in programs if is_live_title(p.get("title") or "")])
+        self.by_channel = {channel: _Index(items) for channel, items in by_channel.items()}
+
+    @classmethod
+    def from_file(cls, path: str = "azam_tv_shows.json") -> "EpgStore":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("message", {}).get("program_details", []))
+
+    def __len__(self) -> int:
+        return len(self.all.programs)
+
+    def channels(self) -> List[str]:
+        return sorted(self.by_channel)
+
+    def on_now(self, channel_name: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Program running on a channel at a given time.
+        Args:
+            channel_name: EPG channel name, e.g. "117-Azam Sports 1 HD-TANZANIA"
+            at: Moment to look up, defaults to now
+        Returns:
+            Program dict, or None if nothing is scheduled
+        """
+        index = self.by_channel.get(channel_name)
+        if index is None:
+            return None
+        return index.at(at or epg_now())
+
+    def between(self, start: datetime, end: datetime, channel_name: Optional[str] = None,
+                live_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Programs overlapping [start, end), ordered by start time.
+        Args:
+            start: Range start
+            end: Range end
+            channel_name: Restrict to one channel
+            live_only: Only programs with "live" in the title
+        Returns:
+            List of program dicts
+        """
+        if channel_name is not None:
+            index = self.by_channel.get(channel_name)
+            if index is None:
+                return []
+            programs = index.overlapping(start, end)
+            if live_only:
+                programs = [p for p in programs if is_live_title(p.get("title") or "")]
+            return programs
+        return (self.live if live_only else self.all).overlapping(start, end)
+
+    def live_in_next(self, hours: float = 3, at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Live events running now or starting within the next hours."""
+        start = at or epg_now()
+        return self.between(start, start + timedelta(hours=hours), live_only=True)
+
+    def live_programs(self) -> List[Dict[str, Any]]:
+        """Every live event in the store, ordered by start time."""
+        return self.live.programs
+
+
+def strip_index_fields(program: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the parsed _start/_end fields before serializing a program."""
+    return {key: value for key, value in program.items() if not key.startswith("_")}
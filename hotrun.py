@@ -4,8 +4,43 @@ import time
 import re
 import os
 import shutil
-from typing import Dict, Tuple, Optional, Any, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import threading
+from typing import Dict, Tuple, Optional, Any, Iterator, List
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
+from channel_snapshot import SnapshotWriter
+from token_store import TokenStore
+from portal_breaker import PortalBreakers, PortalUnavailable
+from mac_history import MacHistory, schedule
+
+# Columnar snapshot of every harvested channel, written after each run (see channel_snapshot.py)
+snapshot_file = os.path.join("specialiptvs", "channels.snap")
+
+# Handshake tokens reused across runs (see token_store.py)
+token_store = TokenStore()
+
+# Circuit breaker per portal, so a dead portal fails its MACs fast (see portal_breaker.py)
+breakers = PortalBreakers()
+# Extra passes over MACs deferred by an open breaker, and the longest wait for a breaker to half-open
+retry_waves = 1
+max_retry_wait = 120
+
+# Past results per MAC, used to harvest the most valuable MACs first (see mac_history.py)
+mac_history = MacHistory()
+# Seconds a harvest may take, or None for no limit; overridden by --budget
+time_budget: Optional[float] = None
+
+# Race the get_all_channels endpoint variants instead of trying them one by one,
+# starting each variant hedge_delay seconds after the previous one
+hedged_requests = True
+hedge_delay = 1.0
+# Shared by all MACs; attempts queued here are cancelled once a variant wins
+hedge_pool = ThreadPoolExecutor(max_workers=600, thread_name_prefix="hedge")
+
+# Pages fetched at once per MAC when falling back to the paginated get_ordered_list
+page_workers = 8
+# Shared by all MACs, capping the page threads of a whole harvest
+page_pool = ThreadPoolExecutor(max_workers=600, thread_name_prefix="pages")
 
 def print_colored(text: str, color: str) -> None:
     """
@@ -58,20 +93,111 @@ def get_token(session: requests.Session, base_url: str) -> Optional[str]:
     url = f"{base_url}/portal.php?action=handshake&type=stb&token=&JsHttpRequest=1-xml"
     try:
         res = session.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
+        breakers.record_success(base_url)
         if res.status_code == 200:
             return res.json().get('js', {}).get('token')
+    except (requests.ConnectionError, requests.Timeout):
+        breakers.record_failure(base_url)
+        return None
     except Exception:
         return None
 
+def handshake(base_url: str, mac: str) -> Optional[str]:
+    """
+    Handshake for a MAC on a fresh session and store the token.
+    Args:
+        base_url: Portal base URL
+        mac: MAC address
+    Returns:
+        Token string if successful, None otherwise
+    Raises:
+        PortalUnavailable: If the portal's circuit breaker is open
+    """
+    if breakers.is_open(base_url):
+        raise PortalUnavailable(base_url)
+    session = requests.Session()
+    session.cookies.update({'mac': mac})
+    token = get_token(session, base_url)
+    if token:
+        token_store.put(base_url, mac, token)
+    return token
+
+class TokenRejected(Exception):
+    """Raised when the portal rejects the token itself, as opposed to failing to answer."""
+
+def is_auth_failure(status_code: int, payload: Any = None) -> bool:
+    """
+    Whether a portal response means the token was rejected.
+    Args:
+        status_code: HTTP status code
+        payload: Parsed JSON body, if any
+    Returns:
+        True for HTTP 401/403 or Stalker's "Authorization failed" payload
+    """
+    if status_code in (401, 403):
+        return True
+    return isinstance(payload, dict) and 'authoriz' in str(payload.get('text', '')).lower()
+
+def fetch_channel_data(session: requests.Session, base_url: str, url: str, headers: Dict[str, str],
+                       done: Optional[threading.Event] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch one get_all_channels endpoint variant.
+    Args:
+        session: Requests session
+        base_url: Portal base URL
+        url: Endpoint URL
+        headers: Request headers
+        done: Set once another variant has won; the response body is then not read.
+            Passing it marks a hedged attempt, whose breaker outcome get_channel_list records
+    Returns:
+        The js.data list if the endpoint returned one, None otherwise
+    Raises:
+        TokenRejected: If the portal rejected the token
+        requests.ConnectionError, requests.Timeout: For hedged attempts the portal didn't answer
+    """
+    hedged = done is not None
+    try:
+        res = session.get(url, headers=headers, timeout=15, stream=True)
+        if not hedged:
+            breakers.record_success(base_url)
+        with res:
+            if is_auth_failure(res.status_code):
+                raise TokenRejected(base_url)
+            if res.status_code != 200 or (done is not None and done.is_set()):
+                return None
+            payload = res.json()
+            data = payload.get('js', {})
+            if 'data' in data:
+                return data['data']
+            if is_auth_failure(res.status_code, payload):
+                raise TokenRejected(base_url)
+    except TokenRejected:
+        raise
+    except (requests.ConnectionError, requests.Timeout):
+        if hedged:
+            raise
+        breakers.record_failure(base_url)
+    except Exception:
+        pass
+    return None
+
 def get_channel_list(session: requests.Session, base_url: str, token: str) -> Optional[List[Dict[str, Any]]]:
     """
     Get the channel list from the portal.
+    With hedged_requests the endpoint variants are raced, each starting hedge_delay
+    seconds after the previous one (or as soon as the previous one failed); the first
+    non-empty js.data wins and the remaining attempts are cancelled. The breaker only
+    hears about the race as a whole, so a hanging variant that lost doesn't count
+    against a portal that answered.
     Args:
         session: Requests session
         base_url: Portal base URL
         token: Authentication token
     Returns:
         List of channels if successful, None otherwise
+    Raises:
+        PortalUnavailable: If the portal's circuit breaker opens while trying the endpoints
+        TokenRejected: If no variant returned channels and at least one rejected the token
     """
     endpoints = [
         f"{base_url}/portal.php?type=itv&action=get_all_channels&JsHttpRequest=1-xml",
@@ -81,18 +207,195 @@ def get_channel_list(session: requests.Session, base_url: str, token: str) -> Op
     
     headers = {"Authorization": f"Bearer {token}", "User-Agent": "Mozilla/5.0"}
     
-    for url in endpoints:
+    if not hedged_requests:
+        rejected = False
+        for url in endpoints:
+            if breakers.is_open(base_url):
+                raise PortalUnavailable(base_url)
+            try:
+                data = fetch_channel_data(session, base_url, url, headers)
+            except TokenRejected:
+                rejected = True
+                continue
+            if data is not None:
+                return data
+        if rejected:
+            raise TokenRejected(base_url)
+        return None
+    
+    done = threading.Event()
+    futures = []
+    try:
+        for i, url in enumerate(endpoints):
+            if breakers.is_open(base_url):
+                raise PortalUnavailable(base_url)
+            futures.append(hedge_pool.submit(fetch_channel_data, session, base_url, url, headers, done))
+            # After the last variant, wait for whichever attempts are still running
+            deadline = time.time() + hedge_delay if i < len(endpoints) - 1 else None
+            while True:
+                for future in futures:
+                    if future.done() and future.exception() is None and future.result():
+                        breakers.record_success(base_url)
+                        return future.result()
+                running = [future for future in futures if not future.done()]
+                timeout = None if deadline is None else deadline - time.time()
+                # Move on once the delay is up or the newest attempt has already failed
+                if not running or (deadline is not None and (timeout <= 0 or futures[-1].done())):
+                    break
+                wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        # No winner, and every attempt has finished
+        if all(isinstance(future.exception(), (requests.ConnectionError, requests.Timeout)) for future in futures):
+            breakers.record_failure(base_url)
+        else:
+            breakers.record_success(base_url)
+        if any(isinstance(future.exception(), TokenRejected) for future in futures):
+            raise TokenRejected(base_url)
+        return None
+    finally:
+        # Losers that already have a response close it without reading the body
+        done.set()
+        for future in futures:
+            future.cancel()
+
+def get_ordered_page(session: requests.Session, base_url: str, path: str, headers: Dict[str, str],
+                     page: int) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one page of get_ordered_list.
+    Args:
+        session: Requests session
+        base_url: Portal base URL
+        path: Endpoint path variant, e.g. "server/load.php"
+        headers: Request headers
+        page: Page number, starting at 1
+    Returns:
+        The js object (total_items, max_page_items, data) if successful, None otherwise
+    Raises:
+        TokenRejected: If the portal rejected the token
+    """
+    url = (f"{base_url}/{path}?type=itv&action=get_ordered_list&genre=*&fav=0&sortby=number"
+           f"&p={page}&JsHttpRequest=1-xml")
+    try:
+        res = session.get(url, headers=headers, timeout=15)
+        breakers.record_success(base_url)
+        if is_auth_failure(res.status_code):
+            raise TokenRejected(base_url)
+        if res.status_code == 200:
+            payload = res.json()
+            data = payload.get('js', {})
+            if isinstance(data, dict) and isinstance(data.get('data'), list):
+                return data
+            if is_auth_failure(res.status_code, payload):
+                raise TokenRejected(base_url)
+    except TokenRejected:
+        raise
+    except (requests.ConnectionError, requests.Timeout):
+        breakers.record_failure(base_url)
+    except Exception:
+        pass
+    return None
+
+def get_channel_list_paged(session: requests.Session, base_url: str, token: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the channel list page by page, for portals where get_all_channels fails.
+    The first page of get_ordered_list gives the page count; the remaining pages are
+    fetched on the shared page_pool, at most page_workers at a time for this MAC;
+    failed pages are retried once, and the pages are joined in order.
+    Args:
+        session: Requests session
+        base_url: Portal base URL
+        token: Authentication token
+    Returns:
+        List of channels if successful, None otherwise
+    Raises:
+        PortalUnavailable: If the portal's circuit breaker opens while trying the endpoints
+        TokenRejected: If no variant returned channels and at least one rejected the token
+    """
+    paths = ["server/load.php", "stalker_portal/server/load.php", "portal.php"]
+    headers = {"Authorization": f"Bearer {token}", "User-Agent": "Mozilla/5.0"}
+    
+    rejected = False
+    for path in paths:
+        if breakers.is_open(base_url):
+            raise PortalUnavailable(base_url)
         try:
-            res = session.get(url, headers=headers, timeout=15)
-            if res.status_code == 200:
-                data = res.json().get('js', {})
-                if 'data' in data:
-                    return data['data']
-        except Exception:
+            first = get_ordered_page(session, base_url, path, headers, 1)
+        except TokenRejected:
+            rejected = True
+            continue
+        if first is None or not first['data']:
             continue
+        
+        channels = list(first['data'])
+        try:
+            total = int(first.get('total_items') or 0)
+            per_page = int(first.get('max_page_items') or 0) or len(channels)
+        except (TypeError, ValueError):
+            return channels
+        page_count = -(-total // per_page)
+        if page_count <= 1:
+            return channels
+        
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        missing = list(range(2, page_count + 1))
+        for attempt in range(2):
+            slots = threading.Semaphore(page_workers)
+            futures = {}
+            for page in missing:
+                slots.acquire()
+                future = page_pool.submit(get_ordered_page, session, base_url, path, headers, page)
+                future.add_done_callback(lambda _: slots.release())
+                futures[future] = page
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except TokenRejected:
+                    continue
+                if result is not None:
+                    pages[futures[future]] = result['data']
+            missing = [page for page in missing if page not in pages]
+            if not missing:
+                break
+        if missing:
+            print_colored(f"Missing {len(missing)} of {page_count} channel pages", "yellow")
+        
+        for page in sorted(pages):
+            channels.extend(pages[page])
+        return channels
     
+    if rejected:
+        raise TokenRejected(base_url)
     return None
 
+def fetch_channels(session: requests.Session, base_url: str, token: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the channel list, falling back to the paginated get_ordered_list.
+    Args:
+        session: Requests session
+        base_url: Portal base URL
+        token: Authentication token
+    Returns:
+        List of channels if successful, None otherwise
+    Raises:
+        TokenRejected: If neither method returned channels and the portal rejected the token
+    """
+    rejected = False
+    try:
+        channels = get_channel_list(session, base_url, token)
+    except TokenRejected:
+        channels, rejected = None, True
+    if channels:
+        return channels
+    
+    # Some portals disable get_all_channels or time out on large lineups
+    print_colored("get_all_channels failed, fetching the channel list page by page", "yellow")
+    try:
+        channels = get_channel_list_paged(session, base_url, token)
+    except TokenRejected:
+        rejected = True
+    if not channels and rejected:
+        raise TokenRejected(base_url)
+    return channels
+
 def get_genre_list(session: requests.Session, base_url: str, token: str) -> Dict[int, str]:
     """
     Get the genre/group list from the portal.
@@ -111,11 +414,17 @@ def get_genre_list(session: requests.Session, base_url: str, token: str) -> Dict
     headers = {"Authorization": f"Bearer {token}", "User-Agent": "Mozilla/5.0"}
     
     for url in endpoints:
+        if breakers.is_open(base_url):
+            print_colored("Portal unreachable, channels will not be grouped by genre", "yellow")
+            break
         try:
             res = session.get(url, headers=headers, timeout=15)
+            breakers.record_success(base_url)
             if res.status_code == 200:
                 data = res.json().get('js', [])
                 return {group['id']: group['title'] for group in data}
+        except (requests.ConnectionError, requests.Timeout):
+            breakers.record_failure(base_url)
         except Exception:
             continue
     
@@ -207,8 +516,53 @@ def sort_groups(group_names: List[str]) -> List[str]:
     
     return priority1_groups + priority2_groups + other_groups
 
+def build_channel_entries(base_url: str, mac: str, channels_data: List[Dict[str, Any]],
+                          group_info: Dict[int, str]) -> List[Tuple[str, str]]:
+    """
+    Build the M3U entries for a channel list in sorted group order.
+    Args:
+        base_url: Portal base URL
+        mac: MAC address
+        channels_data: List of channel data
+        group_info: Dictionary of group information
+    Returns:
+        List of (#EXTINF line, stream url) tuples
+    """
+    entries = []
+
+    # Get all unique groups and sort them
+    all_groups = set()
+    for channel in channels_data:
+        group_id = channel.get('tv_genre_id', -1)
+        group_name = group_info.get(group_id, "General")
+        all_groups.add(group_name)
+
+    sorted_groups = sort_groups(list(all_groups))
+
+    # Collect channels in sorted group order
+    for group in sorted_groups:
+        for channel in channels_data:
+            group_id = channel.get('tv_genre_id', -1)
+            current_group = group_info.get(group_id, "General")
+
+            if current_group == group:
+                name = channel.get('name', 'Unnamed Channel')
+                logo = channel.get('logo', '')
+                cmd = channel.get('cmd', '')
+
+                if 'cmds' in channel and len(channel['cmds']) > 0:
+                    cmd = channel['cmds'][0]['url'].replace('ffmpeg ', '')
+
+                if "localhost" in cmd:
+                    if match := re.search(r'/ch/(\d+)_', cmd):
+                        cmd = f"{base_url}/play/live.php?mac={mac}&stream={match.group(1)}&extension=ts"
+
+                entries.append((f'#EXTINF:-1 tvg-logo="{logo}" group-title="{current_group}",{name}', cmd))
+
+    return entries
+
 def save_channel_list(base_url: str, mac: str, channels_data: List[Dict[str, Any]], 
-                     group_info: Dict[int, str], mac_counter: int) -> None:
+                     group_info: Dict[int, str], mac_counter: int) -> Optional[List[Tuple[str, str]]]:
     """
     Save the channel list to an M3U file with proper grouping.
     Args:
@@ -217,82 +571,169 @@ def save_channel_list(base_url: str, mac: str, channels_data: List[Dict[str, Any
         channels_data: List of channel data
         group_info: Dictionary of group information
         mac_counter: Counter for file naming
+    Returns:
+        The (#EXTINF line, stream url) entries written, or None on error
     """
     output_folder = "specialiptvs"
     os.makedirs(output_folder, exist_ok=True)
     
     try:
+        entries = build_channel_entries(base_url, mac, channels_data, group_info)
         with open(f"{output_folder}/MAC{mac_counter}.m3u", 'w', encoding='utf-8') as f:
             f.write('#EXTM3U\n')
-            
-            # Get all unique groups and sort them
-            all_groups = set()
-            for channel in channels_data:
-                group_id = channel.get('tv_genre_id', -1)
-                group_name = group_info.get(group_id, "General")
-                all_groups.add(group_name)
-            
-            sorted_groups = sort_groups(list(all_groups))
-            
-            # Write channels in sorted group order
-            for group in sorted_groups:
-                for channel in channels_data:
-                    group_id = channel.get('tv_genre_id', -1)
-                    current_group = group_info.get(group_id, "General")
-                    
-                    if current_group == group:
-                        name = channel.get('name', 'Unnamed Channel')
-                        logo = channel.get('logo', '')
-                        cmd = channel.get('cmd', '')
-                        
-                        if 'cmds' in channel and len(channel['cmds']) > 0:
-                            cmd = channel['cmds'][0]['url'].replace('ffmpeg ', '')
-                        
-                        if "localhost" in cmd:
-                            if match := re.search(r'/ch/(\d+)_', cmd):
-                                cmd = f"{base_url}/play/live.php?mac={mac}&stream={match.group(1)}&extension=ts"
-                        
-                        f.write(f'#EXTINF:-1 tvg-logo="{logo}" group-title="{current_group}",{name}\n{cmd}\n')
+            for extinf, cmd in entries:
+                f.write(f'{extinf}\n{cmd}\n')
+        return entries
     except Exception as e:
         print_colored(f"Error saving channel list: {e}", "red")
+        return None
 
-def process_mac(base_url: str, mac: str, mac_counter: int) -> None:
+def process_mac(base_url: str, mac: str, mac_counter: int) -> Optional[List[Tuple[str, str]]]:
     """
     Process a single MAC address to extract its channel list.
     Args:
         base_url: Portal base URL
         mac: MAC address
         mac_counter: Counter for file naming
+    Returns:
+        The (#EXTINF line, stream url) entries saved to MAC{mac_counter}.m3u, or None on failure
+    Raises:
+        PortalUnavailable: If the portal's circuit breaker is open; the MAC should be retried later
     """
+    # Blocks while another MAC probes a half-open portal
+    breakers.check(base_url)
     session = requests.Session()
     session.cookies.update({'mac': mac})
     
     print_colored(f"\nProcessing MAC: {mac}", "cyan")
     
-    # Get authentication token
-    token = get_token(session, base_url)
-    if not token:
-        print_colored("Failed to get token", "red")
-        return
+    # Get authentication token, reusing the one from a previous run if it is still valid
+    token = token_store.get(base_url, mac)
+    cached = token is not None
+    if not cached:
+        token = get_token(session, base_url)
+        if not token:
+            print_colored("Failed to get token", "red")
+            return None
+        token_store.put(base_url, mac, token)
     
     # Get channel list
-    channels = get_channel_list(session, base_url, token)
+    try:
+        channels = fetch_channels(session, base_url, token)
+    except TokenRejected:
+        channels = None
+        if cached:
+            # The stored token was revoked; handshake once and retry. Timeouts and
+            # server errors keep the token, since they say nothing about it.
+            token_store.invalidate(base_url, mac)
+            token = get_token(session, base_url)
+            if token:
+                token_store.put(base_url, mac, token)
+                try:
+                    channels = fetch_channels(session, base_url, token)
+                except TokenRejected:
+                    channels = None
     if not channels:
         print_colored("Failed to get channel list", "red")
-        return
+        return None
     
     # Get genre/group list
     genres = get_genre_list(session, base_url, token)
     
     # Save to M3U file
-    save_channel_list(base_url, mac, channels, genres, mac_counter)
+    entries = save_channel_list(base_url, mac, channels, genres, mac_counter)
+    if entries is None:
+        return None
     print_colored(f"Successfully saved MAC{mac_counter}.m3u", "green")
     time.sleep(0.5)  # Rate limiting
+    return entries
+
+def harvest_macs(base_urls_and_macs: List[Tuple[str, str]], max_workers: int = 300,
+                 budget: Optional[float] = None) -> Iterator[Tuple[int, Optional[List[Tuple[str, str]]]]]:
+    """
+    Run process_mac for every MAC in parallel, yielding results as they finish.
+    MACs are submitted in mac_history.schedule order, so reliable MACs with big lineups
+    go first and portals are interleaved. MACs on a portal whose circuit breaker is open
+    are deferred; once the first pass is done they get up to retry_waves more passes,
+    after waiting for the breakers to half-open.
+    Args:
+        base_urls_and_macs: List of (base_url, mac) tuples
+        max_workers: Number of concurrent MACs
+        budget: Seconds the harvest may take; MACs not started by then are skipped
+    Returns:
+        Iterator of (mac_counter, entries) tuples; entries is None for failed MACs
+    """
+    deadline = time.time() + budget if budget else None
+    pending = [(idx + 1, base_url, mac) for idx, (base_url, mac) in enumerate(base_urls_and_macs)]
+    pending = schedule(pending, mac_history)
+    
+    def finish(future, work, deferred):
+        mac_counter, base_url, mac = work
+        try:
+            entries = future.result()
+        except PortalUnavailable:
+            deferred.append(work)
+            return
+        except Exception as e:
+            print_colored(f"Error processing MAC: {str(e)}", "red")
+            entries = None
+        mac_history.record(base_url, mac, len(entries) if entries else None)
+        yield mac_counter, entries
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for wave in range(retry_waves + 1):
+            if wave:
+                next_retry = breakers.next_retry()
+                if next_retry is not None:
+                    delay = min(max(0.0, next_retry - time.time()), max_retry_wait)
+                    if deadline is not None and time.time() + delay >= deadline:
+                        break
+                    time.sleep(delay)
+                print_colored(f"\nRetrying {len(pending)} MACs on portals that were unreachable", "yellow")
+            
+            # The pool's queue is FIFO, so submission order is harvest order
+            futures = {
+                executor.submit(process_mac, base_url, mac, mac_counter): (mac_counter, base_url, mac)
+                for mac_counter, base_url, mac in pending
+            }
+            deferred = []
+            unfinished = set(futures)
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.time())
+                for future in as_completed(futures, timeout=timeout):
+                    unfinished.discard(future)
+                    yield from finish(future, futures[future], deferred)
+            except FuturesTimeout:
+                skipped = [future for future in unfinished if future.cancel()]
+                print_colored(f"Time budget used up, skipping {len(skipped)} lower-priority MACs", "yellow")
+                # MACs already running are allowed to finish; deferrals among them are reported below
+                for future in as_completed(unfinished - set(skipped)):
+                    yield from finish(future, futures[future], deferred)
+                pending = deferred
+                break
+            
+            pending = schedule(deferred, mac_history)
+            if not pending:
+                break
+    
+    if pending:
+        portals = {base_url for _, base_url, _ in pending}
+        print_colored(f"Skipped {len(pending)} MACs on {len(portals)} unreachable portal(s)", "yellow")
+        for _, base_url, mac in pending:
+            mac_history.record_deferred(base_url, mac)
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     """
     Main function to process all MAC addresses from the input file.
+    Args:
+        argv: Command-line arguments, defaults to sys.argv
     """
+    parser = argparse.ArgumentParser(description="Harvest channel lists for every MAC in fixmac.txt")
+    parser.add_argument("--budget", type=float,
+                        help="minutes the harvest may take; the most valuable MACs are harvested first")
+    args = parser.parse_args(argv)
+    budget = args.budget * 60 if args.budget else time_budget
+    
     try:
         print_colored("Starting IPTV channel list extraction...", "magenta")
         
@@ -306,18 +747,17 @@ def main() -> None:
         shutil.rmtree("specialiptvs", ignore_errors=True)
         os.makedirs("specialiptvs", exist_ok=True)
         
+        # Keep stored tokens fresh while the run is going
+        token_store.start_refresher(handshake)
+        
         # Process all MACs in parallel (limited to 300 concurrent)
-        with ThreadPoolExecutor(max_workers=300) as executor:
-            futures = [
-                executor.submit(process_mac, base_url, mac, idx+1)
-                for idx, (base_url, mac) in enumerate(base_urls_and_macs)
-            ]
-            
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    print_colored(f"Error processing MAC: {str(e)}", "red")
+        snapshot = SnapshotWriter()
+        for mac_counter, entries in harvest_macs(base_urls_and_macs, max_workers=300, budget=budget):
+            if entries:
+                snapshot.add_playlist(f"MAC{mac_counter}.m3u", entries)
+        
+        snapshot.write(snapshot_file)
+        print_colored(f"Saved {len(snapshot)} channels to {snapshot_file}", "green")
         
         print_colored("\nAll MAC addresses processed successfully", "green")
     
@@ -325,6 +765,10 @@ def main() -> None:
         print_colored("\nProcess interrupted by user", "yellow")
     except Exception as e:
         print_colored(f"Fatal error: {str(e)}", "red")
+    finally:
+        token_store.stop_refresher()
+        token_store.save()
+        mac_history.save()
 
 if __name__ == "__main__":
     main()
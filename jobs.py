@@ -0,0 +1,182 @@
+"""
+Background job runner for the Flask app.
+
+Jobs run as subprocesses on a worker thread; their output is written line by
+line to a log file in jobs_folder instead of being buffered in memory. A job
+that is already queued or running is reused rather than started twice.
+
+The registry lives in the web process, so the app should run with a single
+gunicorn worker (see render.yaml).
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import threading
+import subprocess
+from typing import Dict, Iterator, List, Optional, Tuple
+
+jobs_folder = "jobs"
+# Finished jobs kept in the registry (their logs stay on disk)
+max_finished_jobs = 20
+
+# Log tailing: bytes read per step and the longest line kept before it is split
+tail_chunk_bytes = 64 * 1024
+tail_max_line_bytes = 16 * 1024
+tail_poll_interval = 0.5
+
+
+class Job:
+    """One run of a command, with its status, progress and log file."""
+
+    def __init__(self, name: str, command: List[str], progress_pattern: Optional[str] = None,
+                 total: Optional[int] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.command = command
+        self.progress_re = re.compile(progress_pattern) if progress_pattern else None
+        self.total = total
+        self.done = 0
+        self.lines = 0
+        self.last_line = ""
+        self.status = "queued"
+        self.returncode = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log_path = os.path.abspath(os.path.join(jobs_folder, f"{self.id}.log"))
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "returncode": self.returncode,
+            "progress": {"done": self.done, "total": self.total},
+            "lines": self.lines,
+            "last_line": self.last_line,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """Runs jobs one at a time per name on background threads."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        os.makedirs(jobs_folder, exist_ok=True)
+
+    def submit(self, name: str, command: List[str], progress_pattern: Optional[str] = None,
+               total: Optional[int] = None) -> Job:
+        """
+        Start a job unless one with the same name is already queued or running.
+        Args:
+            name: Job name used for deduplication, e.g. "hotrun"
+            command: Command line to run
+            progress_pattern: Regex; each matching output line counts as one unit of progress
+            total: Expected number of progress units, if known
+        Returns:
+            The new job, or the one already running
+        """
+        with self.lock:
+            for job in self.jobs.values():
+                if job.name == name and job.active:
+                    return job
+            job = Job(name, command, progress_pattern, total)
+            self.jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=self._run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def recent(self) -> List[Job]:
+        with self.lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _prune(self) -> None:
+        finished = sorted((job for job in self.jobs.values() if not job.active), key=lambda job: job.created_at)
+        for job in finished[:max(0, len(finished) - max_finished_jobs)]:
+            del self.jobs[job.id]
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        try:
+            with open(job.log_path, "w", encoding="utf-8") as log:
+                process = subprocess.Popen(job.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                           text=True, errors="replace", bufsize=1, env=env)
+                for line in process.stdout:
+                    log.write(line)
+                    log.flush()
+                    job.lines += 1
+                    job.last_line = line.rstrip()[-200:]
+                    if job.progress_re and job.progress_re.search(line):
+                        job.done += 1
+                job.returncode = process.wait()
+            job.status = "finished" if job.returncode == 0 else "failed"
+        except Exception as e:
+            with open(job.log_path, "a", encoding="utf-8") as log:
+                log.write(f"Job error: {e}\n")
+            job.status = "failed"
+        job.finished_at = time.time()
+
+
+def follow_log(job: Job, offset: int = 0) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Tail a job's log file until the job finishes.
+    Only one chunk and at most one partial line are held in memory at a time.
+    Args:
+        job: Job to follow
+        offset: Byte offset to resume from
+    Yields:
+        (offset after the line, line) pairs; line is None while waiting for output
+    """
+    while not os.path.exists(job.log_path):
+        if not job.active:
+            return
+        yield offset, None
+        time.sleep(tail_poll_interval)
+
+    with open(job.log_path, "rb") as log:
+        log.seek(offset)
+        partial = b""
+        while True:
+            # Check before reading so the last chunk written before exit is not missed
+            finished = not job.active
+            chunk = log.read(tail_chunk_bytes)
+            if chunk:
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                for line in lines:
+                    offset += len(line) + 1
+                    yield offset, line.decode("utf-8", errors="replace")
+                if len(partial) > tail_max_line_bytes:
+                    offset += len(partial)
+                    yield offset, partial.decode("utf-8", errors="replace")
+                    partial = b""
+                continue
+            if finished:
+                if partial:
+                    yield offset + len(partial), partial.decode("utf-8", errors="replace")
+                return
+            yield offset, None
+            time.sleep(tail_poll_interval)
+
+
+runner = JobRunner()
+
+
+def python_command(script: str) -> List[str]:
+    return [sys.executable, "-u", script]
@@ -1,5 +1,13 @@
 import requests
 import time
+import os
+import re
+import math
+from urllib.parse import urljoin
+from collections import deque, OrderedDict
+from typing import List, Optional, Tuple
+
+from segment_store import SegmentStore
 
 # Base URL where the m3u8 files are hosted
 base_url = 'http://185.243.7.47'
@@ -14,41 +22,345 @@ headers = {
     'Origin': 'http://zonalresults.totalh.net',
 }
 
-# Function to fetch and update the playlist
-def update_playlist():
-    # Send GET request to fetch the M3U8 content
-    response = requests.get(m3u8_url, headers=headers)
-
-    if response.status_code == 200:
-        print("M3U8 playlist loaded successfully.")
-
-        # Split the content by lines
-        m3u8_content = response.text.splitlines()
-
-        # Open the azam.m3u8 file in append mode to keep adding new segments
-        with open("azam.m3u8", "a") as f:
-            # Iterate over each line in the M3U8 content
-            for line in m3u8_content:
-                # If the line contains a segment path (i.e., .ts file)
-                if line and line.startswith('/hls/'):
-                    segment_url = base_url + line
-                    f.write(f"#EXTINF:10,\n{segment_url}\n")  # Write segment URL to the m3u8 file
-                    print(f"Added Segment URL: {segment_url}")
-                    
-                    # Optional: Download the segment
-                    segment_response = requests.get(segment_url)
-                    if segment_response.status_code == 200:
-                        with open(f"segment_{line.split('/')[-1]}", 'wb') as seg_file:
-                            seg_file.write(segment_response.content)
-                            print(f"Downloaded: {line.split('/')[-1]}")
-                    else:
-                        print(f"Failed to download segment: {segment_url}")
-    else:
+# Output playlist
+playlist_file = "azam.m3u8"
+
+# Live output: keep only the last N segments with a proper HLS header.
+# Set to False to fall back to the old append-only behaviour.
+live_output = True
+live_window_size = 6
+
+# Optional archive index of every segment seen, split over several files
+archive_enabled = False
+archive_folder = "azam_archive"
+archive_max_segments = 1000  # segments per archive file before rolling over
+
+# Download every new segment into a managed store that evicts old segments
+download_segments = True
+segment_store_folder = "segments"
+segment_store_bytes = 2 * 1024 * 1024 * 1024
+
+# Duration used when the upstream playlist has no #EXTINF for a segment
+default_segment_duration = 10.0
+
+
+def write_atomic(path: str, content: str) -> None:
+    """
+    Write a file so readers never see a half-written playlist.
+    Args:
+        path: Destination file
+        content: Full file content
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def segment_url_for(uri: str, playlist_url: Optional[str] = None) -> str:
+    """
+    Resolve a segment URI from the upstream playlist to a full URL.
+    Args:
+        uri: Segment line from the playlist (absolute or /hls/... path)
+        playlist_url: Final URL of the playlist; defaults to base_url
+    Returns:
+        Absolute segment URL
+    """
+    if uri.startswith('http'):
+        return uri
+    if playlist_url:
+        return urljoin(playlist_url, uri)
+    return base_url + uri
+
+
+def parse_segments(m3u8_text: str, playlist_url: Optional[str] = None) -> List[Tuple[float, str]]:
+    """
+    Parse segment entries from an HLS media playlist.
+    Args:
+        m3u8_text: Playlist content
+        playlist_url: Final URL of the playlist, used to resolve relative URIs
+    Returns:
+        List of (duration, segment_url) tuples in playlist order
+    """
+    segments = []
+    duration = default_segment_duration
+    for line in m3u8_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXTINF:'):
+            match = re.match(r'#EXTINF:([\d.]+)', line)
+            duration = float(match.group(1)) if match else default_segment_duration
+        elif not line.startswith('#') and (playlist_url or line.startswith('/hls/') or line.startswith('http')):
+            segments.append((duration, segment_url_for(line, playlist_url)))
+            duration = default_segment_duration
+    return segments
+
+
+def fetch_playlist(url: str = m3u8_url, session: Optional[requests.Session] = None) -> Optional[str]:
+    """
+    Fetch the upstream m3u8 playlist.
+    Args:
+        url: Playlist URL
+        session: Optional requests session to reuse connections
+    Returns:
+        Playlist text if successful, None otherwise
+    """
+    getter = session or requests
+    try:
+        response = getter.get(url, headers=headers, timeout=10)
+    except Exception as e:
+        print(f"Failed to load M3U8 playlist: {e}")
+        return None
+    if response.status_code != 200:
         print(f"Failed to load M3U8 playlist. Status Code: {response.status_code}")
+        return None
+    return response.text
+
+
+def fetch_segment(segment_url: str, session: Optional[requests.Session] = None) -> Optional[bytes]:
+    """
+    Fetch a single segment.
+    Args:
+        segment_url: Absolute segment URL
+        session: Optional requests session to reuse connections
+    Returns:
+        Segment bytes if successful, None otherwise
+    """
+    getter = session or requests
+    try:
+        response = getter.get(segment_url, headers=headers, timeout=15)
+    except Exception:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+_segment_store = None
+
+
+def get_segment_store() -> SegmentStore:
+    """Return the shared segment store, opening it on first use."""
+    global _segment_store
+    if _segment_store is None:
+        _segment_store = SegmentStore(segment_store_folder, segment_store_bytes)
+    return _segment_store
+
+
+def download_segment(segment_url: str, session: Optional[requests.Session] = None) -> None:
+    """
+    Download a segment into the segment store as segment_<name>.
+    Args:
+        segment_url: Absolute segment URL
+        session: Optional requests session to reuse connections
+    """
+    name = segment_url.split('/')[-1]
+    content = fetch_segment(segment_url, session)
+    if content is not None:
+        get_segment_store().put(f"segment_{name}", content)
+        print(f"Downloaded: {name}")
+    else:
+        print(f"Failed to download segment: {segment_url}")
+
+
+class LivePlaylist:
+    """Sliding window of the most recent segments, rewritten as a live HLS playlist."""
+
+    def __init__(self, path: str = playlist_file, window_size: int = live_window_size):
+        self.path = path
+        self.window = deque(maxlen=window_size)
+        self.next_sequence = 0
+        # Remember more URLs than the window holds so a segment that already
+        # slid out is not added again when the upstream playlist still lists it.
+        self.seen = OrderedDict()
+        self.seen_limit = max(window_size * 4, 64)
+        self.load()
+
+    def load(self) -> None:
+        """
+        Resume from the playlist file of an earlier run, so EXT-X-MEDIA-SEQUENCE
+        keeps counting up instead of restarting at 0 under players that already
+        know the stream.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return
+        match = re.search(r'^#EXT-X-MEDIA-SEQUENCE:(\d+)', content, re.MULTILINE)
+        if not match:
+            return
+        self.next_sequence = int(match.group(1))
+        for duration, segment_url in parse_segments(content):
+            self.add(duration, segment_url)
+
+    def reserve(self, upstream_segments: int) -> None:
+        """
+        Make sure every segment the upstream playlist lists stays remembered.
+        DVR and event playlists can list far more segments than the window holds.
+        Args:
+            upstream_segments: Number of segments in the latest upstream playlist
+        """
+        self.seen_limit = max(self.seen_limit, 2 * upstream_segments)
+
+    def newer(self, segments: List[Tuple[float, str]]) -> List[Tuple[float, str]]:
+        """
+        Drop the upstream segments up to the newest one already in the window.
+        This also covers segments from before a restart, which are no longer in seen.
+        Args:
+            segments: (duration, segment_url) pairs from the upstream playlist
+        Returns:
+            The segments after the newest known one, or all of them if it isn't listed
+        """
+        if self.window:
+            newest = self.window[-1][2]
+            for i in range(len(segments) - 1, -1, -1):
+                if segments[i][1] == newest:
+                    return segments[i + 1:]
+        return segments
+
+    def add(self, duration: float, segment_url: str) -> bool:
+        """
+        Add a segment to the window.
+        Args:
+            duration: Segment duration in seconds
+            segment_url: Absolute segment URL
+        Returns:
+            True if the segment was new, False if it was already seen
+        """
+        if segment_url in self.seen:
+            return False
+        self.seen[segment_url] = None
+        if len(self.seen) > self.seen_limit:
+            self.seen.popitem(last=False)
+        self.window.append((self.next_sequence, duration, segment_url))
+        self.next_sequence += 1
+        return True
+
+    def media_sequence(self) -> int:
+        """Sequence number of the first segment in the window."""
+        return self.window[0][0] if self.window else self.next_sequence
+
+    def render(self) -> str:
+        """Build the playlist text for the current window."""
+        target = max((d for _, d, _ in self.window), default=default_segment_duration)
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(target)}",
+            f"#EXT-X-MEDIA-SEQUENCE:{self.media_sequence()}",
+        ]
+        for _, duration, segment_url in self.window:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(segment_url)
+        return "\n".join(lines) + "\n"
+
+    def save(self) -> None:
+        """Atomically rewrite the playlist file."""
+        write_atomic(self.path, self.render())
+
+
+class ArchiveIndex:
+    """Append-only index of every segment, rolled over into numbered files."""
+
+    def __init__(self, folder: str = archive_folder, max_segments: int = archive_max_segments):
+        self.folder = folder
+        self.max_segments = max_segments
+        os.makedirs(folder, exist_ok=True)
+        existing = [f for f in os.listdir(folder) if re.match(r'archive_\d+\.m3u8$', f)]
+        self.file_index = max((int(f[8:-5]) for f in existing), default=0) + 1
+        self.entries = []
+        self.first_sequence = 0
+
+    def current_path(self) -> str:
+        return os.path.join(self.folder, f"archive_{self.file_index:05d}.m3u8")
+
+    def render(self, closed: bool) -> str:
+        """Build the playlist text for the current archive file."""
+        target = max((d for _, d, _ in self.entries), default=default_segment_duration)
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{math.ceil(target)}",
+            f"#EXT-X-MEDIA-SEQUENCE:{self.first_sequence}",
+        ]
+        for _, duration, segment_url in self.entries:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(segment_url)
+        if closed:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def add(self, sequence: int, duration: float, segment_url: str) -> None:
+        """
+        Record a segment, rolling over to a new file when the current one is full.
+        Args:
+            sequence: Media sequence number of the segment
+            duration: Segment duration in seconds
+            segment_url: Absolute segment URL
+        """
+        if not self.entries:
+            self.first_sequence = sequence
+        self.entries.append((sequence, duration, segment_url))
+        if len(self.entries) >= self.max_segments:
+            write_atomic(self.current_path(), self.render(closed=True))
+            self.file_index += 1
+            self.entries = []
+
+    def save(self) -> None:
+        """Atomically rewrite the open archive file."""
+        if self.entries:
+            write_atomic(self.current_path(), self.render(closed=False))
+
+
+# Function to fetch and update the playlist
+def update_playlist(live: Optional[LivePlaylist] = None, archive: Optional[ArchiveIndex] = None,
+                    session: Optional[requests.Session] = None) -> None:
+    m3u8_content = fetch_playlist(m3u8_url, session)
+    if m3u8_content is None:
+        return
+    print("M3U8 playlist loaded successfully.")
+
+    segments = parse_segments(m3u8_content)
+
+    if live is None:
+        # Legacy mode: keep appending every segment line to the playlist file
+        with open(playlist_file, "a") as f:
+            for duration, segment_url in segments:
+                f.write(f"#EXTINF:10,\n{segment_url}\n")
+                print(f"Added Segment URL: {segment_url}")
+                if download_segments:
+                    download_segment(segment_url, session)
+        return
+
+    live.reserve(len(segments))
+    new_segments = 0
+    for duration, segment_url in live.newer(segments):
+        if not live.add(duration, segment_url):
+            continue
+        new_segments += 1
+        print(f"Added Segment URL: {segment_url}")
+        if archive is not None:
+            archive.add(live.next_sequence - 1, duration, segment_url)
+        if download_segments:
+            download_segment(segment_url, session)
+
+    if new_segments:
+        live.save()
+        if archive is not None:
+            archive.save()
+
 
 # Set the interval time (e.g., 5 seconds = 5)
 interval = 5  # seconds
 
-while True:
-    update_playlist()  # Update the playlist and download new segments
-    time.sleep(interval)  # Wait for the specified interval before checking again
+if __name__ == "__main__":
+    session = requests.Session()
+    live = LivePlaylist() if live_output else None
+    archive = ArchiveIndex() if live_output and archive_enabled else None
+
+    while True:
+        update_playlist(live, archive, session)  # Update the playlist and download new segments
+        time.sleep(interval)  # Wait for the specified interval before checking again
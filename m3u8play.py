@@ -1,5 +1,15 @@
 import os
+import re
 import time
+import math
+import struct
+import ctypes
+import ctypes.util
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+import ts_analyzer
+import segment_store
 
 # Path to your folder containing .ts files
 ts_folder_path = "/Users/amanisinkala/Downloads/m3u-main"
@@ -7,53 +17,270 @@ ts_folder_path = "/Users/amanisinkala/Downloads/m3u-main"
 # Output m3u8 playlist file
 playlist_file = "playlist.m3u8"
 
+# How new segments are picked up: "inotify", "poll" or "auto" (inotify when available)
+watch_mode = "auto"
+poll_interval = 10  # seconds, only used by the polling fallback
+
+# Duration used when a segment carries no usable timestamps
+default_segment_duration = 10.0
+
+# Durations measured on earlier runs, keyed by file size and mtime
+analysis_cache_file = "ts_analysis_cache.json"
+
+
+def segment_sequence(file_name: str) -> Optional[int]:
+    """
+    Parse the sequence number from a segment name like segment_1118130_75.ts.
+    Args:
+        file_name: Segment file name
+    Returns:
+        Sequence number, or None if the name has no trailing number
+    """
+    match = re.search(r'(\d+)\.ts$', file_name)
+    return int(match.group(1)) if match else None
+
+
+def segment_sort_key(file_name: str):
+    sequence = segment_sequence(file_name)
+    return (sequence if sequence is not None else -1, file_name)
+
+
+def get_segment_duration(ts_file_path: str) -> float:
+    """
+    Get a segment's real duration from its PCR/PTS timestamps.
+    Args:
+        ts_file_path: Path to the .ts file
+    Returns:
+        Duration in seconds, or default_segment_duration if it can't be measured
+    """
+    try:
+        duration = ts_analyzer.analyze_segment(ts_file_path).duration
+    except (OSError, ValueError):
+        return default_segment_duration
+    return duration or default_segment_duration
+
+
+def list_segments() -> List[str]:
+    """
+    List the folder's .ts files in sequence order, using the segment store index when present.
+    Returns:
+        Segment file names
+    """
+    names = segment_store.read_index(ts_folder_path)
+    if names is None:
+        names = [f for f in os.listdir(ts_folder_path) if f.endswith('.ts')]
+    return sorted(names, key=segment_sort_key)
+
+
+def render_playlist(entries: List[Tuple[str, float]], media_sequence: int = 0, live: bool = False) -> str:
+    """
+    Build playlist text for a list of segments.
+    Args:
+        entries: (segment name, duration) pairs in playlist order
+        media_sequence: Sequence number of the first entry
+        live: Leave the playlist open (no #EXT-X-ENDLIST) so segments can be appended
+    Returns:
+        Playlist content
+    """
+    target = max((duration for _, duration in entries), default=default_segment_duration)
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{math.ceil(target)}",
+        f"#EXT-X-MEDIA-SEQUENCE:{media_sequence}",
+    ]
+    for ts_file, duration in entries:
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(os.path.join(ts_folder_path, ts_file))
+    if not live:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def write_playlist(content: str) -> None:
+    tmp_file = f"{playlist_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        f.write(content)
+    os.replace(tmp_file, playlist_file)
+
+
 # Function to generate the playlist
-def generate_playlist():
-    # Open the .m3u8 file to write
-    with open(playlist_file, 'w') as f:
-        # Write m3u8 header
-        f.write("#EXTM3U\n")
-        f.write("#EXT-X-VERSION:3\n")
-        f.write("#EXT-X-TARGETDURATION:10\n")
-        f.write("#EXT-X-MEDIA-SEQUENCE:0\n")
-        
-        # Iterate over each .ts file in the folder and write it to the playlist
-        ts_files = sorted([f for f in os.listdir(ts_folder_path) if f.endswith('.ts')])
-        for ts_file in ts_files:
-            ts_file_path = os.path.join(ts_folder_path, ts_file)
-            f.write(f"#EXTINF:10,\n{ts_file_path}\n")
-        
-        # End the playlist
-        f.write("#EXT-X-ENDLIST\n")
+def generate_playlist(live: bool = False) -> List[Tuple[str, float]]:
+    """
+    Write a playlist for every .ts file currently in the folder.
+    Args:
+        live: Leave the playlist open (no #EXT-X-ENDLIST) so segments can be appended;
+            the newest segment is left out since it may still be written, and is
+            appended by append_to_playlist once it is closed
+    Returns:
+        (segment name, duration) pairs written to the playlist
+    """
+    ts_analyzer.load_cache(analysis_cache_file)
+    segments = list_segments()
+    if live:
+        # A partial duration would also be cached under the open file's size and mtime
+        segments = segments[:-1]
+    entries = [(ts_file, get_segment_duration(os.path.join(ts_folder_path, ts_file)))
+               for ts_file in segments]
+    ts_analyzer.save_cache(analysis_cache_file)
 
+    write_playlist(render_playlist(entries, live=live))
     print(f"Generated playlist: {playlist_file}")
+    return entries
 
-# Function to append new .ts files to the playlist
-def append_to_playlist():
-    existing_files = set()  # Keep track of already included files in the playlist
+
+class _Inotify:
+    """Minimal ctypes wrapper around Linux inotify."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, path: str):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(0)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_DELETE | self.IN_MOVED_FROM
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+
+    def read_names(self) -> List[str]:
+        """
+        Block until files are closed, moved or deleted in the folder.
+        Returns:
+            Names of the files that were closed or moved in; empty if only deletions happened
+        """
+        data = os.read(self.fd, 64 * 1024)
+        names = []
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            if name and mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                names.append(os.fsdecode(name))
+        return names
+
+
+def _watch_inotify() -> Iterator[List[str]]:
+    watcher = _Inotify(ts_folder_path)
+    # Catch up on segments closed before the watch existed. The newest one may
+    # still be open; its close event will arrive through inotify.
+    existing = sorted((f for f in os.listdir(ts_folder_path) if f.endswith('.ts')), key=segment_sort_key)
+    yield existing[:-1]
+    while True:
+        yield [name for name in watcher.read_names() if name.endswith('.ts')]
+
+
+def _watch_poll() -> Iterator[List[str]]:
+    """Yield finished .ts files, rescanning only when the folder changes."""
+    last_dir_mtime = None
     while True:
-        # Get the current set of .ts files in the directory
-        current_files = set(f for f in os.listdir(ts_folder_path) if f.endswith('.ts'))
+        dir_mtime = os.stat(ts_folder_path).st_mtime_ns
+        if dir_mtime != last_dir_mtime:
+            last_dir_mtime = dir_mtime
+            now = time.time()
+            names = []
+            newest = None
+            with os.scandir(ts_folder_path) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.ts'):
+                        names.append(entry.name)
+                        if newest is None or segment_sort_key(entry.name) > segment_sort_key(newest.name):
+                            newest = entry
+            # The newest segment may still be open; wait until it stops changing
+            if newest is not None and now - newest.stat().st_mtime < poll_interval:
+                names.remove(newest.name)
+                last_dir_mtime = None
+            yield names
+        time.sleep(poll_interval)
 
-        # Check for any new files that haven't been added to the playlist yet
-        new_files = current_files - existing_files
 
-        if new_files:
-            # Open the playlist in append mode
-            with open(playlist_file, 'a') as f:
-                for ts_file in sorted(new_files):
-                    ts_file_path = os.path.join(ts_folder_path, ts_file)
-                    f.write(f"#EXTINF:10,\n{ts_file_path}\n")
-                    print(f"Appended: {ts_file_path}")
+def watch_segments() -> Iterator[List[str]]:
+    """
+    Yield batches of finished .ts file names as they appear in the folder.
+    Deletions wake the watcher too (with an empty or partial batch).
+    Uses inotify when available and falls back to polling otherwise.
+    """
+    if watch_mode in ("auto", "inotify"):
+        try:
+            yield from _watch_inotify()
+            return
+        except OSError as e:
+            if watch_mode == "inotify":
+                raise
+            print(f"inotify unavailable ({e}), falling back to polling")
+    yield from _watch_poll()
+
+
+# Function to append new .ts files to the playlist
+def append_to_playlist(entries: Optional[List[Tuple[str, float]]] = None) -> None:
+    """
+    Append segments to the playlist as soon as they are closed, dropping
+    segments from the head once they are deleted or evicted from the folder.
+    The playlist is rewritten when segments are trimmed or when a new segment is
+    longer than #EXT-X-TARGETDURATION, which must never be exceeded.
+    Args:
+        entries: (segment name, duration) pairs already in the playlist
+    """
+    entries = deque(entries or [])
+    media_sequence = 0
+    # Must match what render_playlist wrote in the header
+    target = math.ceil(max((duration for _, duration in entries), default=default_segment_duration))
+    # Only the newest segment written is remembered for ordering, instead of every file name
+    last_key = segment_sort_key(entries[-1][0]) if entries else None
+    f = open(playlist_file, 'a')
+    try:
+        for names in watch_segments():
+            rewrite = False
+            for ts_file in sorted(set(names), key=segment_sort_key):
+                key = segment_sort_key(ts_file)
+                if last_key is not None and key <= last_key:
+                    continue
+                ts_file_path = os.path.join(ts_folder_path, ts_file)
+                duration = get_segment_duration(ts_file_path)
+                entries.append((ts_file, duration))
+                last_key = key
+                if math.ceil(duration) > target:
+                    target = math.ceil(duration)
+                    rewrite = True
+                if not rewrite:
+                    f.write(f"#EXTINF:{duration:.3f},\n{ts_file_path}\n")
+                    f.flush()
+                print(f"Appended: {ts_file_path}")
 
-            # Update the set of existing files
-            existing_files.update(new_files)
+            # Trim segments that were evicted; only the head needs checking
+            trimmed = 0
+            while entries and not os.path.exists(os.path.join(ts_folder_path, entries[0][0])):
+                entries.popleft()
+                trimmed += 1
+            if trimmed:
+                media_sequence += trimmed
+                print(f"Trimmed {trimmed} evicted segments from {playlist_file}")
+            if trimmed or rewrite:
+                f.close()
+                write_playlist(render_playlist(list(entries), media_sequence, live=True))
+                f = open(playlist_file, 'a')
+                if rewrite:
+                    print(f"Raised #EXT-X-TARGETDURATION to {target}")
+    finally:
+        f.close()
 
-        # Wait for some time before checking again
-        time.sleep(10)
 
-# Initialize the playlist
-generate_playlist()
+if __name__ == "__main__":
+    # Initialize the playlist
+    entries = generate_playlist(live=True)
 
-# Start appending new files to the playlist
-append_to_playlist()
+    # Start appending new files to the playlist
+    append_to_playlist(entries)
@@ -0,0 +1,156 @@
+"""
+Persisted per-MAC harvest history and the priority order hotrun.py harvests in.
+
+Every harvested MAC records whether it worked and how many channels it
+returned. A MAC's score combines a recency-weighted success rate, the size of
+its last lineup and how recently it last worked; MACs never seen before get a
+neutral prior so they are still tried ahead of MACs that keep failing.
+schedule() sorts each portal's MACs by score and interleaves the portals, so the
+most valuable MACs go first and no portal gets all of its MACs at once.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+history_file = "mac_history.json"
+# Weight of the latest run in the success rate
+success_weight = 0.3
+# A MAC that last worked this many days ago counts half as much
+freshness_half_life = 7.0
+# Prior for MACs without history
+unknown_success_rate = 0.5
+unknown_freshness = 0.5
+
+Item = TypeVar("Item", bound=Tuple)
+
+
+class MacHistory:
+    """Thread-safe (portal, MAC) -> harvest stats, persisted as JSON."""
+
+    def __init__(self, path: str = history_file):
+        self.path = path
+        self.lock = threading.Lock()
+        # "portal|MAC" -> {"success_rate", "channels", "attempts", "last_attempt", "last_success"},
+        # plus "deferred" and "last_deferred" once the MAC's portal was unreachable
+        self.macs: Dict[str, Dict] = {}
+        self.loaded = False
+        self.dirty = False
+
+    @staticmethod
+    def key(portal: str, mac: str) -> str:
+        return f"{portal.rstrip('/')}|{mac.upper()}"
+
+    def _load(self) -> None:
+        # Called with the lock held
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.macs = json.load(f).get("macs", {})
+        except (OSError, ValueError):
+            self.macs = {}
+
+    def record(self, portal: str, mac: str, channels: Optional[int]) -> None:
+        """
+        Record one harvest attempt.
+        Args:
+            portal: Portal base URL
+            mac: MAC address
+            channels: Number of channels harvested, or None if the MAC failed
+        """
+        now = time.time()
+        ok = bool(channels)
+        with self.lock:
+            self._load()
+            stats = self.macs.setdefault(self.key(portal, mac), {
+                "success_rate": unknown_success_rate, "channels": 0, "attempts": 0,
+                "last_attempt": 0.0, "last_success": 0.0,
+            })
+            stats["success_rate"] = round((1 - success_weight) * stats["success_rate"] + success_weight * ok, 4)
+            stats["attempts"] += 1
+            stats["last_attempt"] = now
+            if ok:
+                stats["channels"] = channels
+                stats["last_success"] = now
+            self.dirty = True
+
+    def record_deferred(self, portal: str, mac: str) -> None:
+        """
+        Record a MAC that was not harvested because its portal was unreachable.
+        The MAC itself was never tried, so its success rate is left alone.
+        Args:
+            portal: Portal base URL
+            mac: MAC address
+        """
+        now = time.time()
+        with self.lock:
+            self._load()
+            stats = self.macs.setdefault(self.key(portal, mac), {
+                "success_rate": unknown_success_rate, "channels": 0, "attempts": 0,
+                "last_attempt": 0.0, "last_success": 0.0,
+            })
+            stats["deferred"] = stats.get("deferred", 0) + 1
+            stats["last_deferred"] = now
+            self.dirty = True
+
+    def scores(self, items: Sequence[Tuple[str, str]]) -> List[float]:
+        """Priority score of each (portal, MAC); higher is harvested first."""
+        now = time.time()
+        with self.lock:
+            self._load()
+            known = [self.macs.get(self.key(portal, mac)) for portal, mac in items]
+            lineups = [stats["channels"] for stats in self.macs.values() if stats["channels"]]
+        # Unknown MACs are assumed to have an average lineup
+        typical_channels = sum(lineups) / len(lineups) if lineups else 1.0
+
+        scores = []
+        for stats in known:
+            if stats is None:
+                rate, channels, freshness = unknown_success_rate, typical_channels, unknown_freshness
+            else:
+                rate, channels = stats["success_rate"], stats["channels"]
+                age_days = (now - stats["last_success"]) / 86400 if stats["last_success"] else math.inf
+                freshness = 0.5 ** (age_days / freshness_half_life)
+            scores.append(rate * math.log1p(channels) * freshness)
+        return scores
+
+    def save(self) -> None:
+        """Write the history atomically if anything was recorded."""
+        with self.lock:
+            if not self.loaded or not self.dirty:
+                return
+            data = json.dumps({"macs": self.macs}, indent=2)
+            self.dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+def schedule(items: List[Item], history: MacHistory) -> List[Item]:
+    """
+    Order MACs for harvesting: each portal's MACs by descending score, portals interleaved.
+    Args:
+        items: Tuples whose last two fields are (base_url, mac), e.g. (mac_counter, base_url, mac)
+        history: Run history to score against
+    Returns:
+        The same items in harvest order
+    """
+    scores = history.scores([item[-2:] for item in items])
+    by_portal: Dict[str, List[Tuple[float, int, Item]]] = {}
+    for position, (item, score) in enumerate(zip(items, scores)):
+        by_portal.setdefault(item[-2].rstrip("/"), []).append((score, position, item))
+    queues = [sorted(queue, key=lambda entry: (-entry[0], entry[1])) for queue in by_portal.values()]
+
+    # Round-robin over portals; within a round the best remaining MACs go first
+    ordered = []
+    for depth in range(max((len(queue) for queue in queues), default=0)):
+        round_ = [queue[depth] for queue in queues if depth < len(queue)]
+        round_.sort(key=lambda entry: (-entry[0], entry[1]))
+        ordered.extend(item for _, _, item in round_)
+    return ordered
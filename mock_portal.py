@@ -0,0 +1,282 @@
+"""
+Local mock of a Stalker middleware portal for offline harvest testing.
+
+Implements the calls hotrun.py makes (handshake, get_all_channels,
+get_ordered_list and get_genres) under all three path variants it tries:
+
+    /portal.php
+    /server/load.php
+    /stalker_portal/server/load.php
+
+Channel and genre counts, response latency, random error rates, per-MAC
+failures and which path variants answer are all configurable, so harvester
+changes can be measured without touching the real portals in fixmac.txt.
+
+    python mock_portal.py --port 8765 --channels 5000 --latency 0.05
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+PATH_VARIANTS = {
+    "/portal.php": "portal",
+    "/server/load.php": "server",
+    "/stalker_portal/server/load.php": "stalker_portal",
+}
+
+
+class PortalConfig:
+    """Behaviour of the mock portal."""
+
+    def __init__(self, channels: int = 2000, genres: int = 40, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, mac_failure_rate: float = 0.0,
+                 channel_variants: Tuple[str, ...] = ("portal", "server", "stalker_portal"),
+                 genre_variants: Tuple[str, ...] = ("server", "stalker_portal"),
+                 ordered_variants: Tuple[str, ...] = ("server", "stalker_portal"), page_size: int = 14,
+                 localhost_cmds: float = 0.5, seed: int = 1):
+        """
+        Args:
+            channels: Channels returned by get_all_channels
+            genres: Genres returned by get_genres
+            latency: Seconds added to every response
+            jitter: Extra random latency, uniformly 0..jitter seconds
+            error_rate: Fraction of requests answered with HTTP 500
+            mac_failure_rate: Fraction of MACs whose handshake is refused (chosen by MAC hash)
+            channel_variants: Path variants that answer get_all_channels; others return 404
+            genre_variants: Path variants that answer get_genres
+            ordered_variants: Path variants that answer the paginated get_ordered_list
+            page_size: Channels per get_ordered_list page (max_page_items)
+            localhost_cmds: Fraction of channels with "localhost" cmds that hotrun rewrites
+            seed: Seed for the generated channel list
+        """
+        self.channels = channels
+        self.genres = genres
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.mac_failure_rate = mac_failure_rate
+        self.channel_variants = tuple(channel_variants)
+        self.genre_variants = tuple(genre_variants)
+        self.ordered_variants = tuple(ordered_variants)
+        self.page_size = page_size
+        self.localhost_cmds = localhost_cmds
+        self.seed = seed
+
+    def mac_fails(self, mac: str) -> bool:
+        digest = hashlib.sha1(mac.upper().encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 < self.mac_failure_rate
+
+
+def token_for(mac: str) -> str:
+    return hashlib.sha1(f"mock-portal:{mac.upper()}".encode("utf-8")).hexdigest()
+
+
+def build_payloads(config: PortalConfig) -> Tuple[bytes, bytes, List[bytes]]:
+    """Serialize the channel, genre and channel page responses once; every MAC gets the same lists."""
+    rng = random.Random(config.seed)
+    words = ["Azam", "Sports", "TRACE", "Optus", "TNT", "News", "Movies", "Kids", "Music", "Cinema"]
+    countries = ["UK", "US", "FR", "DE", "TZ", "KE", "AR", "ES", "IT", "PT"]
+
+    genres = [{"id": str(i + 1), "title": f"{rng.choice(countries)} | {rng.choice(words)} {i + 1}"}
+              for i in range(config.genres)]
+    channels = []
+    for i in range(config.channels):
+        channel_id = 10000 + i
+        if rng.random() < config.localhost_cmds:
+            cmd = f"ffmpeg http://localhost/ch/{channel_id}_"
+        else:
+            cmd = f"ffmpeg http://stream.mock.local/live/{channel_id}.ts"
+        channels.append({
+            "id": str(channel_id),
+            "name": f"{rng.choice(words)} {rng.choice(words)} {i % 20 + 1} HD",
+            "logo": f"http://logo.mock.local/{channel_id}.png",
+            "tv_genre_id": str(rng.randint(1, max(1, config.genres))),
+            "cmd": cmd,
+            "cmds": [{"url": cmd}],
+        })
+    channel_body = json.dumps({"js": {"total_items": len(channels), "data": channels}}).encode("utf-8")
+    genre_body = json.dumps({"js": genres}).encode("utf-8")
+    page_bodies = [
+        json.dumps({"js": {"total_items": len(channels), "max_page_items": config.page_size,
+                           "cur_page": page + 1, "data": channels[start:start + config.page_size]}}).encode("utf-8")
+        for page, start in enumerate(range(0, len(channels), config.page_size))
+    ]
+    return channel_body, genre_body, page_bodies
+
+
+class PortalStats:
+    """Request counters, keyed by action and status code."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, action: str, status: int) -> None:
+        key = f"{action}:{status}"
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockPortal"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def send_body(self, status: int, body: bytes, action: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.add(action, status)
+
+    def mac(self) -> str:
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "mac":
+                return value
+        return ""
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        action = query.get("action", [""])[0]
+        variant = PATH_VARIANTS.get(url.path)
+
+        delay = config.latency + (random.uniform(0, config.jitter) if config.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if variant is None:
+            return self.send_body(404, b'{"error":"not found"}', action)
+        if random.random() < config.error_rate:
+            return self.send_body(500, b'{"error":"internal"}', action)
+
+        mac = self.mac()
+        if action == "handshake":
+            if not mac or config.mac_fails(mac):
+                return self.send_body(200, b'{"js":{}}', action)
+            return self.send_body(200, json.dumps({"js": {"token": token_for(mac)}}).encode("utf-8"), action)
+
+        if self.headers.get("Authorization", "") != f"Bearer {token_for(mac)}":
+            return self.send_body(401, b'{"error":"unauthorized"}', action)
+        if action == "get_all_channels" and variant in config.channel_variants:
+            return self.send_body(200, self.server.channel_body, action)
+        if action == "get_ordered_list" and variant in config.ordered_variants:
+            try:
+                page = int(query.get("p", ["1"])[0])
+            except ValueError:
+                page = 1
+            pages = self.server.page_bodies
+            if 1 <= page <= len(pages):
+                return self.send_body(200, pages[page - 1], action)
+            return self.send_body(200, json.dumps({"js": {"total_items": config.channels,
+                                                          "max_page_items": config.page_size,
+                                                          "cur_page": page, "data": []}}).encode("utf-8"), action)
+        if action == "get_genres" and variant in config.genre_variants:
+            return self.send_body(200, self.server.genre_body, action)
+        return self.send_body(404, b'{"error":"not found"}', action)
+
+
+class MockPortal(ThreadingHTTPServer):
+    """Threaded HTTP server answering as a Stalker portal."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, config: PortalConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), PortalHandler)
+        self.config = config
+        self.stats = PortalStats()
+        self.channel_body, self.genre_body, self.page_bodies = build_payloads(config)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="mock-portal", daemon=True)
+        thread.start()
+        return thread
+
+
+def generate_macs(count: int, prefix: str = "00:1A:79") -> List[str]:
+    """Distinct MAC addresses in the usual Stalker 00:1A:79 range."""
+    return [f"{prefix}:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}" for i in range(count)]
+
+
+def write_mac_file(path: str, base_url: str, macs: List[str]) -> None:
+    """Write a fixmac.txt-style file (base_url$MAC per line)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for mac in macs:
+            f.write(f"{base_url}${mac}\n")
+
+
+def config_from_args(args: argparse.Namespace) -> PortalConfig:
+    return PortalConfig(
+        channels=args.channels,
+        genres=args.genres,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        mac_failure_rate=args.mac_failure_rate,
+        channel_variants=tuple(args.channel_variants.split(",")),
+        genre_variants=tuple(args.genre_variants.split(",")),
+        ordered_variants=tuple(args.ordered_variants.split(",")),
+        page_size=args.page_size,
+    )
+
+
+def add_portal_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--genres", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, 0..jitter seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--mac-failure-rate", type=float, default=0.0, help="fraction of MACs refused at handshake")
+    parser.add_argument("--channel-variants", default="portal,server,stalker_portal",
+                        help="path variants answering get_all_channels")
+    parser.add_argument("--genre-variants", default="server,stalker_portal",
+                        help="path variants answering get_genres")
+    parser.add_argument("--ordered-variants", default="server,stalker_portal",
+                        help="path variants answering the paginated get_ordered_list")
+    parser.add_argument("--page-size", type=int, default=14, help="channels per get_ordered_list page")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local mock Stalker portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mac-file", help="also write a fixmac.txt-style file for this portal")
+    parser.add_argument("--macs", type=int, default=100, help="MACs written to --mac-file")
+    add_portal_arguments(parser)
+    args = parser.parse_args(argv)
+
+    portal = MockPortal(config_from_args(args), args.host, args.port)
+    if args.mac_file:
+        write_mac_file(args.mac_file, portal.base_url, generate_macs(args.macs))
+        print(f"Wrote {args.macs} MACs to {args.mac_file}")
+    print(f"Mock portal listening on {portal.base_url}")
+    try:
+        portal.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(portal.stats.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
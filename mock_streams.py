@@ -0,0 +1,214 @@
+"""
+Local synthetic live-stream server for exercising the stream validators.
+
+Every stream is described by its URL, so hundreds of different streams can be
+served without any server-side setup:
+
+    /ts?bitrate=2000                      endless MPEG-TS at 2000 kbit/s
+    /ts?bitrate=2000&slow_start=3         first byte after 3 seconds
+    /ts?bitrate=2000&stall_at=4&stall_for=20
+                                          stops sending for 20 s after 4 s
+    /ts?bitrate=2000&drop_at=5            closes the connection after 5 s
+    /hls/index.m3u8?bitrate=2000          live HLS playlist; segments honour the same options
+    /hls/index.m3u8?segment_status=404    playlist answers, every segment fails with that status
+    /hang                                 accepts the connection, never answers
+    /status/503                           answers with that status code
+
+A dead host is a URL on a port nothing listens on (MockStreamServer.dead_url).
+
+    python mock_streams.py --port 8766
+"""
+
+import time
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+TS_PACKET_SIZE = 188
+# Null packets (PID 0x1FFF) are valid MPEG-TS that players and probes can sync on
+NULL_PACKET = b"\x47\x1f\xff\x10" + b"\xff" * (TS_PACKET_SIZE - 4)
+
+# Streams end after this long even without drop_at, so stray clients can't pin threads forever
+max_stream_seconds = 600
+hang_seconds = 600
+pacing_interval = 0.1
+hls_segment_duration = 4
+hls_window = 3
+
+
+class StreamProfile:
+    """Behaviour of one synthetic stream, read from its query string."""
+
+    def __init__(self, query: Dict[str, List[str]]):
+        def number(name: str, default: float) -> float:
+            try:
+                return float(query.get(name, [default])[0])
+            except ValueError:
+                return default
+
+        self.bitrate = number("bitrate", 2000)  # kbit/s
+        self.slow_start = number("slow_start", 0)
+        self.stall_at = number("stall_at", -1)
+        self.stall_for = number("stall_for", 0)
+        self.drop_at = number("drop_at", -1)
+        self.duration = min(number("duration", max_stream_seconds), max_stream_seconds)
+        self.segment_status = int(number("segment_status", 0))  # HLS segments only
+
+    def bytes_per_tick(self) -> int:
+        packets = max(1, round(self.bitrate * 1000 / 8 * pacing_interval / TS_PACKET_SIZE))
+        return packets * TS_PACKET_SIZE
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    # Streams are close-delimited, as most IPTV hosts serve live TS
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/ts":
+                self.stream_ts(StreamProfile(query))
+            elif url.path == "/hls/index.m3u8":
+                self.hls_playlist(url.query)
+            elif url.path.startswith("/hls/seg/"):
+                self.hls_segment(StreamProfile(query))
+            elif url.path == "/hang":
+                time.sleep(hang_seconds)
+            elif url.path.startswith("/status/"):
+                self.send_error(int(url.path.rsplit("/", 1)[-1]))
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError, ValueError):
+            pass
+
+    def start_body(self, content_type: str, length: Optional[int] = None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def paced_write(self, profile: StreamProfile, limit: Optional[int] = None) -> None:
+        """Write null packets at the profile's bitrate, applying stalls and drops."""
+        chunk = NULL_PACKET * (profile.bytes_per_tick() // TS_PACKET_SIZE)
+        started = time.monotonic()
+        stalled = False
+        sent = 0
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed >= profile.duration or (0 <= profile.drop_at <= elapsed):
+                return
+            if not stalled and 0 <= profile.stall_at <= elapsed:
+                stalled = True
+                time.sleep(profile.stall_for)
+                started += profile.stall_for
+                continue
+            data = chunk if limit is None else chunk[:limit - sent]
+            self.wfile.write(data)
+            sent += len(data)
+            if limit is not None and sent >= limit:
+                return
+            # Sleep until the next tick, measured from the start so pacing doesn't drift
+            ticks = sent / len(chunk)
+            time.sleep(max(0.0, started + ticks * pacing_interval - time.monotonic()))
+
+    def stream_ts(self, profile: StreamProfile) -> None:
+        time.sleep(profile.slow_start)
+        self.start_body("video/mp2t")
+        self.paced_write(profile)
+
+    def hls_playlist(self, query_string: str) -> None:
+        sequence = int(time.time() // hls_segment_duration)
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{hls_segment_duration}",
+            f"#EXT-X-MEDIA-SEQUENCE:{sequence - hls_window + 1}",
+        ]
+        for n in range(sequence - hls_window + 1, sequence + 1):
+            lines.append(f"#EXTINF:{hls_segment_duration:.1f},")
+            lines.append(f"seg/{n}.ts?{query_string}" if query_string else f"seg/{n}.ts")
+        body = ("\n".join(lines) + "\n").encode("utf-8")
+        self.start_body("application/vnd.apple.mpegurl", len(body))
+        self.wfile.write(body)
+
+    def hls_segment(self, profile: StreamProfile) -> None:
+        if profile.segment_status:
+            self.send_response(profile.segment_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        size = profile.bytes_per_tick() * int(hls_segment_duration / pacing_interval)
+        time.sleep(profile.slow_start)
+        self.start_body("video/mp2t", size)
+        self.paced_write(profile, limit=size)
+
+
+class MockStreamServer(ThreadingHTTPServer):
+    """Threaded HTTP server for synthetic streams."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), StreamHandler)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="mock-streams", daemon=True)
+        thread.start()
+        return thread
+
+
+def stream_url(base_url: str, kind: str = "ts", **options) -> str:
+    """
+    URL of a synthetic stream.
+    Args:
+        base_url: Server base URL, e.g. "http://127.0.0.1:8766"
+        kind: "ts", "hls", "hang" or "status"
+        options: bitrate, slow_start, stall_at, stall_for, drop_at, duration; segment_status
+            for "hls"; code for "status"
+    """
+    if kind == "hang":
+        return f"{base_url}/hang"
+    if kind == "status":
+        return f"{base_url}/status/{options.get('code', 503)}"
+    path = "/hls/index.m3u8" if kind == "hls" else "/ts"
+    return f"{base_url}{path}?{urlencode(options)}" if options else f"{base_url}{path}"
+
+
+def dead_url() -> str:
+    """URL on a local port that refuses connections."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/ts"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic MPEG-TS and HLS streams")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = MockStreamServer(args.host, args.port)
+    print(f"Synthetic streams on {server.base_url}, e.g. {stream_url(server.base_url, bitrate=2000)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
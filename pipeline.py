@@ -0,0 +1,227 @@
+"""
+Pipeline orchestrator: harvest -> validate -> publish in one run.
+
+Stages:
+    harvest     hotrun.py: portal MACs from fixmac.txt -> specialiptvs/MACn.m3u, channels.snap
+    toptv       toptv.py: check line 15 of every harvested file -> best/, mvp.m3u
+    brands      best_*.py: AZAM, AZAM SPORT, TRACE, OPTUS, TNT SPORT entries -> best_channels/
+    m3ulinks    m3uchecking.py: m3ulinks.txt -> bestm3u/ (independent of the harvest)
+    teststream  teststream.py: move working files to validm3ufiles/ (runs last, it moves files)
+
+Harvested playlists are handed to the validation stages in memory as soon as
+each MAC finishes, so validation overlaps the harvest instead of waiting for
+it. When harvest is not selected, the playlists already in specialiptvs/ are
+used, which lets single stages be re-run:
+
+    python pipeline.py
+    python pipeline.py --stages brands
+"""
+
+import os
+import time
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import hotrun
+import toptv
+import teststream
+import m3uchecking
+import playlist_scan
+import best_azam
+import best_azam_sports
+import best_trace
+import best_optus
+import best_tnt_sports
+from hotrun import print_colored
+from channel_snapshot import SnapshotWriter
+
+ALL_STAGES = ["harvest", "toptv", "brands", "m3ulinks", "teststream"]
+DEFAULT_STAGES = ["harvest", "toptv", "brands"]
+
+input_file = "fixmac.txt"
+harvest_folder = "specialiptvs"
+harvest_workers = 300
+# toptv probes take up to 80 s each, so keep up with everything the harvest produces
+toptv_workers = harvest_workers
+brand_workers = 20
+
+# (module, line matcher, bytes pattern, label) for every brand publisher
+BRANDS = [
+    (best_azam, best_azam.match_azam_lines, best_azam.azam_pattern, "AZAM"),
+    (best_azam_sports, best_azam_sports.match_azam_sport_lines, best_azam_sports.azam_sport_pattern, "AZAM SPORT"),
+    (best_trace, best_trace.match_trace_lines, best_trace.trace_pattern, "TRACE"),
+    (best_optus, best_optus.match_optus_lines, best_optus.optus_pattern, "OPTUS"),
+    (best_tnt_sports, best_tnt_sports.match_tnt_sport_lines, best_tnt_sports.tnt_sport_pattern, "TNT SPORT"),
+]
+
+
+def entries_to_lines(entries: List[Tuple[str, str]]) -> List[str]:
+    """Turn harvested (#EXTINF, url) entries into the lines of the M3U file hotrun wrote."""
+    lines = ['#EXTM3U\n']
+    for extinf, url in entries:
+        lines.append(extinf + '\n')
+        lines.append(url + '\n')
+    return lines
+
+
+class Pipeline:
+    """Runs the selected stages, feeding each harvested playlist straight to the validators."""
+
+    def __init__(self, stages: List[str], budget: Optional[float] = None):
+        self.stages = stages
+        self.budget = budget
+        self.paths: List[str] = []
+        self.toptv_pool = ThreadPoolExecutor(max_workers=toptv_workers) if "toptv" in stages else None
+        self.brand_pool = ThreadPoolExecutor(max_workers=brand_workers) if "brands" in stages else None
+        self.toptv_futures = []
+        self.brand_futures: Dict[object, list] = {module: [] for module, _, _, _ in BRANDS}
+        self.brand_seen: Dict[object, set] = {module: set() for module, _, _, _ in BRANDS}
+
+    def on_playlist(self, file_path: str, lines: List[str]) -> None:
+        """Queue validation work for a playlist just harvested."""
+        self.on_scan(playlist_scan.ScanResult(
+            file_path,
+            {label: matcher(lines) for _, matcher, _, label in BRANDS} if self.brand_pool is not None else {},
+            lines[:playlist_scan.head_lines],
+        ))
+
+    def on_scan(self, result: playlist_scan.ScanResult) -> None:
+        """Queue validation work for one playlist as soon as it is available."""
+        self.paths.append(result.path)
+        if self.toptv_pool is not None:
+            self.toptv_futures.append(self.toptv_pool.submit(toptv.check_m3u_lines, result.path, result.head))
+        if self.brand_pool is not None:
+            for module, _, _, label in BRANDS:
+                for info, url in result.entries[label]:
+                    if url in self.brand_seen[module]:
+                        continue
+                    self.brand_seen[module].add(url)
+                    future = self.brand_pool.submit(module.download_stream, url)
+                    self.brand_futures[module].append((future, info, url))
+
+    def harvest(self) -> None:
+        base_urls_and_macs = hotrun.get_base_url_and_mac_from_file(input_file)
+        if not base_urls_and_macs:
+            print_colored("No valid MAC addresses found in input file", "red")
+            return
+        shutil.rmtree(harvest_folder, ignore_errors=True)
+        os.makedirs(harvest_folder, exist_ok=True)
+
+        # Keep stored tokens fresh while the run is going, as hotrun.main does
+        hotrun.token_store.start_refresher(hotrun.handshake)
+        try:
+            snapshot = SnapshotWriter()
+            for mac_counter, entries in hotrun.harvest_macs(base_urls_and_macs, max_workers=harvest_workers,
+                                                            budget=self.budget):
+                if entries:
+                    file_name = f"MAC{mac_counter}.m3u"
+                    self.on_playlist(os.path.join(harvest_folder, file_name), entries_to_lines(entries))
+                    snapshot.add_playlist(file_name, entries)
+            snapshot.write(hotrun.snapshot_file)
+        finally:
+            hotrun.token_store.stop_refresher()
+            hotrun.token_store.save()
+            hotrun.mac_history.save()
+
+    def load_harvest(self) -> None:
+        """Feed the playlists from a previous harvest when the harvest stage is skipped."""
+        if not os.path.isdir(harvest_folder):
+            print_colored(f"{harvest_folder}/ not found, nothing to validate", "yellow")
+            return
+        patterns = {label: pattern for _, _, pattern, label in BRANDS} if self.brand_pool is not None else {}
+        # Files are scanned across a process pool; validation starts as results come back
+        for result in playlist_scan.scan_folder(harvest_folder, patterns):
+            self.on_scan(result)
+
+    def publish_toptv(self) -> None:
+        valid_files = []
+        for future in as_completed(self.toptv_futures):
+            try:
+                result = future.result()
+                if result:
+                    valid_files.append(result)
+            except Exception as e:
+                print(f"Error processing file: {e}")
+        toptv.clean_best_folder()
+        toptv.publish_best(valid_files)
+        print_colored(f"toptv: {len(valid_files)} valid playlists published", "green")
+
+    def publish_brands(self) -> None:
+        for module, _, _, label in BRANDS:
+            valid_streams = []
+            for future, info, url in self.brand_futures[module]:
+                try:
+                    if future.result():
+                        valid_streams.append((info, url))
+                except Exception as e:
+                    print(f"Error checking stream: {e}")
+            print_colored(f"{label}: {len(valid_streams)} of {len(self.brand_futures[module])} streams valid", "cyan")
+            module.save_valid_streams(valid_streams)
+
+    def run_teststream(self) -> None:
+        paths = self.paths
+        if not paths:
+            paths = playlist_scan.playlist_paths(harvest_folder)
+        for file_path in paths:
+            if os.path.exists(file_path):
+                teststream.process_m3u_file(file_path)
+
+    def run(self) -> None:
+        timings = {}
+        started = time.time()
+
+        m3ulinks_thread: Optional[threading.Thread] = None
+        if "m3ulinks" in self.stages:
+            m3ulinks_thread = threading.Thread(target=m3uchecking.process_m3u_links, args=("m3ulinks.txt",))
+            m3ulinks_thread.start()
+
+        if "harvest" in self.stages:
+            print_colored("Harvesting portals (validation starts as playlists arrive)...", "magenta")
+            self.harvest()
+        elif "toptv" in self.stages or "brands" in self.stages or "teststream" in self.stages:
+            self.load_harvest()
+        timings["harvest"] = time.time() - started
+
+        if self.toptv_pool is not None:
+            self.publish_toptv()
+            self.toptv_pool.shutdown()
+            timings["toptv"] = time.time() - started
+        if self.brand_pool is not None:
+            self.publish_brands()
+            self.brand_pool.shutdown()
+            timings["brands"] = time.time() - started
+        if m3ulinks_thread is not None:
+            m3ulinks_thread.join()
+            timings["m3ulinks"] = time.time() - started
+        if "teststream" in self.stages:
+            self.run_teststream()
+            timings["teststream"] = time.time() - started
+
+        for stage, elapsed in timings.items():
+            print_colored(f"{stage} finished at {elapsed:.1f}s", "white")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the harvest -> validate -> publish pipeline")
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                        help=f"comma-separated stages to run, from: {', '.join(ALL_STAGES)}")
+    parser.add_argument("--budget", type=float,
+                        help="minutes the harvest may take; the most valuable MACs are harvested first")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in ALL_STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    try:
+        Pipeline(stages, budget=args.budget * 60 if args.budget else None).run()
+    except KeyboardInterrupt:
+        print_colored("\nProcess interrupted by user", "yellow")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Parallel, memory-mapped scanner for folders of harvested playlists (specialiptvs/).
+
+Files are spread over a process pool so scanning the whole folder scales with
+the number of cores. Inside a worker each file is memory-mapped and searched
+as raw bytes with the brand patterns from the best_*.py scripts; only the
+matching #EXTINF lines and the URL after them are sliced out and decoded, so a
+20k-line playlist is never turned into a list of Python strings. A worker
+sends back only those entries and the first few lines for toptv's line-15
+check.
+"""
+
+import io
+import os
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+# Lines kept from the top of each file (toptv.py checks line 15)
+head_lines = 16
+# Worker processes; None uses every core
+scan_workers: Optional[int] = None
+# Files handed to a worker at a time
+scan_chunksize = 8
+
+EXTINF = b'#EXTINF'
+
+
+class ScanResult(NamedTuple):
+    path: str
+    entries: Dict[str, List[Tuple[str, str]]]  # pattern key -> (#EXTINF line, url)
+    head: List[str]
+
+
+def decode_playlist(data: bytes) -> str:
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('iso-8859-1')
+
+
+def read_playlist_lines(file_path: str) -> List[str]:
+    """Read a playlist with a single read, split like readlines() in text mode."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return io.StringIO(decode_playlist(data), newline=None).readlines()
+
+
+def scan_buffer(buf, patterns: Dict[str, Pattern[bytes]]) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Find the entries whose #EXTINF line matches each pattern.
+    Args:
+        buf: Playlist bytes or an mmap of the file
+        patterns: Compiled bytes regexes keyed by name, e.g. best_azam.azam_pattern
+    Returns:
+        For each key, (#EXTINF line with a trailing newline, url) pairs in file order;
+        only entries whose next line is an http URL are kept, as in the match_*_lines functions
+    """
+    size = len(buf)
+    results = {}
+    for key, pattern in patterns.items():
+        entries = []
+        last_line = -1
+        for match in pattern.finditer(buf):
+            line_start = buf.rfind(b'\n', 0, match.start()) + 1
+            if line_start == last_line:
+                continue
+            last_line = line_start
+            if buf[line_start:line_start + len(EXTINF)] != EXTINF:
+                continue
+            line_end = buf.find(b'\n', match.end())
+            if line_end == -1:
+                continue
+            url_end = buf.find(b'\n', line_end + 1)
+            url = buf[line_end + 1:url_end if url_end != -1 else size].strip()
+            if not url.startswith(b'http'):
+                continue
+            info = buf[line_start:line_end].rstrip(b'\r')
+            entries.append((decode_playlist(info) + '\n', decode_playlist(url)))
+        results[key] = entries
+    return results
+
+
+def read_head(buf) -> List[str]:
+    end = 0
+    for _ in range(head_lines):
+        end = buf.find(b'\n', end) + 1
+        if end == 0:
+            end = len(buf)
+            break
+    return io.StringIO(decode_playlist(buf[:end]), newline=None).readlines()[:head_lines]
+
+
+def scan_file(file_path: str, patterns: Dict[str, Pattern[bytes]]) -> ScanResult:
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ScanResult(file_path, {key: [] for key in patterns}, [])
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return ScanResult(file_path, scan_buffer(buf, patterns), read_head(buf))
+    except (OSError, ValueError) as e:
+        print(f"Error reading file {file_path}: {e}")
+        return ScanResult(file_path, {key: [] for key in patterns}, [])
+
+
+def playlist_paths(folder: str) -> List[str]:
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith('.m3u')]
+
+
+def scan_folder(folder: str, patterns: Dict[str, Pattern[bytes]],
+                workers: Optional[int] = scan_workers) -> Iterator[ScanResult]:
+    """
+    Scan every .m3u file in a folder across a process pool.
+    Args:
+        folder: Folder of playlists, e.g. "specialiptvs"
+        patterns: Compiled bytes regexes keyed by name
+        workers: Number of processes, None for one per core
+    Yields:
+        One ScanResult per file, in file name order
+    """
+    paths = playlist_paths(folder)
+    scan = partial(scan_file, patterns=patterns)
+    if workers == 1 or len(paths) < 2:
+        yield from map(scan, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(scan, paths, chunksize=scan_chunksize)
+
+
+def collect_entries(folder: str, pattern: Pattern[bytes]) -> List[Tuple[str, str]]:
+    """All entries one pattern picks from a folder, in file name order."""
+    entries = []
+    for result in scan_folder(folder, {"entries": pattern}):
+        entries.extend(result.entries["entries"])
+    return entries
@@ -0,0 +1,129 @@
+"""
+Per-portal circuit breakers for the hotrun.py harvester.
+
+When a portal is down every one of its MACs would otherwise wait out the
+handshake and channel-list timeouts. Each portal gets a breaker that opens after
+failure_threshold consecutive connection-level failures (refused connections,
+DNS errors, timeouts); while it is open, MACs on that portal are not tried and
+are deferred to hotrun's retry wave. After cooldown seconds the breaker is
+half-open: a single request is let through as a probe, the other MACs of that
+portal are deferred as while it was open (rather than holding a worker while
+they wait), and the breaker closes again on success or reopens with a longer
+cooldown on failure. Any HTTP response counts as success, since
+the portal answered.
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+
+failure_threshold = 5
+cooldown = 30.0
+max_cooldown = 300.0
+# A half-open probe that hasn't reported back after this long is replaced by a new one
+probe_timeout = 60.0
+
+
+class PortalUnavailable(Exception):
+    """Raised instead of contacting a portal whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe -> closed or open again."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = failure_threshold, cooldown: float = cooldown):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.lock = threading.Lock()
+
+    def retry_at(self) -> float:
+        """Time at which an open breaker lets a probe through."""
+        return self.opened_at + self.cooldown
+
+    def allow(self) -> bool:
+        """
+        Whether a request to the portal may go ahead. Never blocks: while a half-open
+        probe is running, other requests are refused until it reports back.
+        """
+        with self.lock:
+            now = time.time()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if now < self.retry_at():
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_started = now
+                return True
+            # Half-open: take over the probe only if it never reported back
+            if now - self.probe_started >= probe_timeout:
+                self.probe_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # The probe failed: back off before trying again
+                self.cooldown = min(self.cooldown * 2, max_cooldown)
+            elif self.state == self.OPEN or self.failures < self.threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = time.time()
+
+
+class PortalBreakers:
+    """One CircuitBreaker per portal base URL, created on first use."""
+
+    def __init__(self, threshold: int = failure_threshold, cooldown: float = cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, portal: str) -> CircuitBreaker:
+        key = portal.rstrip("/")
+        with self.lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(self.threshold, self.cooldown)
+            return breaker
+
+    def allow(self, portal: str) -> bool:
+        return self.get(portal).allow()
+
+    def is_open(self, portal: str) -> bool:
+        """Non-blocking: whether requests to the portal are currently being refused."""
+        return self.get(portal).state == CircuitBreaker.OPEN
+
+    def check(self, portal: str) -> None:
+        """Raise PortalUnavailable if the portal's breaker is open."""
+        if not self.allow(portal):
+            raise PortalUnavailable(portal)
+
+    def record_success(self, portal: str) -> None:
+        self.get(portal).record_success()
+
+    def record_failure(self, portal: str) -> None:
+        self.get(portal).record_failure()
+
+    def next_retry(self) -> Optional[float]:
+        """Earliest time an open breaker lets a probe through, or None if none are open."""
+        with self.lock:
+            breakers = list(self.breakers.values())
+        times = [breaker.retry_at() for breaker in breakers if breaker.state == CircuitBreaker.OPEN]
+        return min(times, default=None)
@@ -0,0 +1,327 @@
+"""
+Local HLS restream server.
+
+Each channel from best_channels/*.json is pulled from upstream once, no matter
+how many viewers are watching. Segments are kept in a bounded LRU cache and
+served as a local live playlist:
+
+    /restream/<channel_id>.m3u8
+    /restream/<channel_id>/<sequence>.ts
+
+Pulling starts on the first playlist request and stops once nobody has asked
+for the channel for idle_timeout seconds. Run it with a single process
+(python restream.py, or gunicorn -w 1 --threads 32 restream:app) so all
+viewers share the same upstream connection.
+"""
+
+import os
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+import requests
+from flask import Flask, Response, abort
+
+import m3u8
+from channel_catalog import catalog
+
+
+# Segment cache budget
+memory_cache_bytes = 256 * 1024 * 1024
+disk_cache_folder = 'restream_cache'  # set to None to keep segments in memory only
+disk_cache_bytes = 2 * 1024 * 1024 * 1024
+
+# Live window served to viewers
+window_size = 6
+# Length of the chunks cut from raw MPEG-TS upstreams (extension=ts)
+ts_chunk_seconds = 4.0
+# Stop pulling a channel after this many seconds without viewers
+idle_timeout = 60
+# How long a first viewer waits for the first segments before getting a 503
+startup_wait = 15
+
+TS_PACKET_SIZE = 188
+
+app = Flask(__name__)
+
+
+def print_colored(text: str, color: str) -> None:
+    """
+    Print colored text to the console.
+    Args:
+        text: The text to print
+        color: The color to use (green, red, yellow, cyan, magenta, white)
+    """
+    colors = {
+        "green": "\033[92m",
+        "red": "\033[91m",
+        "yellow": "\033[93m",
+        "cyan": "\033[96m",
+        "magenta": "\033[95m",
+        "white": "\033[97m"
+    }
+    print(f"{colors.get(color.lower(), '')}{text}\033[0m")
+
+
+class SegmentCache:
+    """Byte-bounded LRU cache of segments, spilling evicted entries to disk."""
+
+    def __init__(self, max_bytes: int = memory_cache_bytes, disk_folder: Optional[str] = disk_cache_folder,
+                 max_disk_bytes: int = disk_cache_bytes):
+        self.max_bytes = max_bytes
+        self.disk_folder = disk_folder
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.disk = OrderedDict()  # key -> size
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_folder, key.replace('/', '_'))
+
+    def _spill(self, key: str, data: bytes) -> None:
+        """Move an entry evicted from memory to the disk tier."""
+        if not self.disk_folder:
+            return
+        # Created on the first spill, so importing this module leaves no folder behind
+        if not self.disk:
+            os.makedirs(self.disk_folder, exist_ok=True)
+        with open(self._disk_path(key), 'wb') as f:
+            f.write(data)
+        self.disk[key] = len(data)
+        self.disk_bytes += len(data)
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            old_key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store a segment.
+        Args:
+            key: Cache key (channel_id/sequence)
+            data: Segment bytes
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory_bytes -= len(self.memory.pop(key))
+            self.memory[key] = data
+            self.memory_bytes += len(data)
+            while self.memory_bytes > self.max_bytes and len(self.memory) > 1:
+                old_key, old_data = self.memory.popitem(last=False)
+                self.memory_bytes -= len(old_data)
+                self._spill(old_key, old_data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a segment, checking memory first and then disk.
+        Args:
+            key: Cache key
+        Returns:
+            Segment bytes, or None if the segment was evicted
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            if key in self.disk:
+                self.disk.move_to_end(key)
+                try:
+                    with open(self._disk_path(key), 'rb') as f:
+                        return f.read()
+                except OSError:
+                    self.disk_bytes -= self.disk.pop(key)
+        return None
+
+
+def is_hls_url(url: str) -> bool:
+    return 'extension=m3u8' in url or url.split('?')[0].endswith('.m3u8')
+
+
+class ChannelRelay:
+    """Pulls one channel from upstream and keeps a live window of cached segments."""
+
+    def __init__(self, channel_id: str, urls: List[str], cache: SegmentCache):
+        self.channel_id = channel_id
+        self.urls = urls
+        self.cache = cache
+        self.window = deque(maxlen=window_size)  # (sequence, duration)
+        self.next_sequence = 0
+        self.last_access = time.time()
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.thread = None
+
+    def touch(self) -> None:
+        self.last_access = time.time()
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def is_idle(self) -> bool:
+        return time.time() - self.last_access > idle_timeout
+
+    def start(self) -> None:
+        """Start the upstream puller if it is not already running."""
+        with self.lock:
+            if self.is_running():
+                return
+            # Segments from a previous run are stale; sequence numbers keep counting
+            self.window.clear()
+            self.ready.clear()
+            self.thread = threading.Thread(target=self._run, name=f"relay-{self.channel_id}", daemon=True)
+            self.thread.start()
+        print_colored(f"Started relay for {self.channel_id}", "cyan")
+
+    def _publish(self, duration: float, data: bytes) -> None:
+        """Cache a new segment and append it to the live window."""
+        sequence = self.next_sequence
+        self.cache.put(f"{self.channel_id}/{sequence}", data)
+        with self.lock:
+            self.window.append((sequence, duration))
+            self.next_sequence += 1
+        self.ready.set()
+
+    def _run(self) -> None:
+        session = requests.Session()
+        url_index = 0
+        while not self.is_idle():
+            url = self.urls[url_index % len(self.urls)]
+            try:
+                if is_hls_url(url):
+                    self._pull_hls(session, url)
+                else:
+                    self._pull_ts(session, url)
+            except Exception as e:
+                print_colored(f"Upstream error on {self.channel_id}: {e}", "yellow")
+            # Upstream ended or failed: try the next mirror
+            url_index += 1
+            if not self.is_idle():
+                time.sleep(1)
+        session.close()
+        print_colored(f"Stopped idle relay for {self.channel_id}", "yellow")
+
+    def _pull_hls(self, session: requests.Session, url: str) -> None:
+        """Follow an upstream HLS playlist, fetching each new segment once."""
+        seen = OrderedDict()
+        failures = 0
+        while not self.is_idle() and failures < 3:
+            response = session.get(url, headers=m3u8.headers, timeout=10)
+            if response.status_code != 200:
+                failures += 1
+                time.sleep(1)
+                continue
+            segments = m3u8.parse_segments(response.text, response.url)
+            if not segments:
+                failures += 1
+            target = m3u8.default_segment_duration
+            for duration, segment_url in segments:
+                target = duration
+                if segment_url in seen:
+                    continue
+                seen[segment_url] = None
+                if len(seen) > 64:
+                    seen.popitem(last=False)
+                data = m3u8.fetch_segment(segment_url, session)
+                if data is None:
+                    failures += 1
+                    continue
+                failures = 0
+                self._publish(duration, data)
+            time.sleep(max(target / 2, 1))
+
+    def _pull_ts(self, session: requests.Session, url: str) -> None:
+        """Cut a continuous MPEG-TS upstream into fixed-length segments."""
+        with session.get(url, headers=m3u8.headers, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            buffer = bytearray()
+            started = time.time()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if self.is_idle():
+                    return
+                buffer.extend(chunk)
+                elapsed = time.time() - started
+                if elapsed >= ts_chunk_seconds:
+                    # Cut on a packet boundary so every segment is valid TS
+                    cut = len(buffer) - len(buffer) % TS_PACKET_SIZE
+                    self._publish(elapsed, bytes(buffer[:cut]))
+                    del buffer[:cut]
+                    started = time.time()
+
+    def render(self) -> Optional[str]:
+        """Build the local live playlist, or None if nothing is cached yet."""
+        with self.lock:
+            window = list(self.window)
+        if not window:
+            return None
+        target = max(duration for _, duration in window)
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(target)}",
+            f"#EXT-X-MEDIA-SEQUENCE:{window[0][0]}",
+        ]
+        for sequence, duration in window:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(f"{self.channel_id}/{sequence}.ts")
+        return "\n".join(lines) + "\n"
+
+
+cache = SegmentCache()
+relays: Dict[str, ChannelRelay] = {}
+relays_lock = threading.Lock()
+
+
+def get_relay(channel_id: str) -> Optional[ChannelRelay]:
+    """
+    Return the relay for a channel, creating it from best_channels on first use.
+    Args:
+        channel_id: Channel id as used in best_channels JSON
+    Returns:
+        ChannelRelay, or None if the channel is unknown
+    """
+    with relays_lock:
+        relay = relays.get(channel_id)
+        if relay is None:
+            urls = catalog.stream_urls(channel_id)
+            if not urls:
+                return None
+            relay = ChannelRelay(channel_id, urls, cache)
+            relays[channel_id] = relay
+    return relay
+
+
+@app.route("/restream/<channel_id>.m3u8")
+def playlist(channel_id: str):
+    relay = get_relay(channel_id)
+    if relay is None:
+        abort(404)
+    relay.touch()
+    relay.start()
+    relay.ready.wait(startup_wait)
+    content = relay.render()
+    if content is None:
+        abort(503)
+    return Response(content, mimetype="application/vnd.apple.mpegurl",
+                    headers={"Cache-Control": "no-cache"})
+
+
+@app.route("/restream/<channel_id>/<int:sequence>.ts")
+def segment(channel_id: str, sequence: int):
+    relay = relays.get(channel_id)
+    if relay is not None:
+        relay.touch()
+    data = cache.get(f"{channel_id}/{sequence}")
+    if data is None:
+        abort(404)
+    return Response(data, mimetype="video/mp2t", headers={"Cache-Control": "max-age=3600"})
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)), threaded=True)
@@ -0,0 +1,130 @@
+"""
+Managed on-disk store for recorded segments.
+
+Keeps a folder of segments under a byte budget, evicting the oldest segments
+first. An index file records every segment
+so neither the recorder nor the playlist generator has to rescan the folder
+on startup.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+INDEX_FILE_NAME = "index.json"
+
+
+def index_path(folder: str) -> str:
+    return os.path.join(folder, INDEX_FILE_NAME)
+
+
+def read_index(folder: str) -> Optional[List[str]]:
+    """
+    Read the segment names recorded in a store folder, oldest first.
+    Args:
+        folder: Store folder
+    Returns:
+        List of segment names, or None if the folder has no index
+    """
+    try:
+        with open(index_path(folder), 'r', encoding='utf-8') as f:
+            return [entry[0] for entry in json.load(f)["segments"]]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class SegmentStore:
+    """Folder of segments kept under max_bytes, evicting the oldest first."""
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # name -> [size, added]; oldest first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        if not self._load_index():
+            self._rebuild_index()
+
+    def _load_index(self) -> bool:
+        try:
+            with open(index_path(self.folder), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # Older indexes also stored a last-access time per segment
+        for name, size, added, *_ in data.get("segments", []):
+            self.entries[name] = [size, added]
+            self.total_bytes += size
+        return True
+
+    def _rebuild_index(self) -> None:
+        """Index whatever is already in the folder; only needed when there is no index yet."""
+        found = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.ts'):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        for mtime, name, size in sorted(found):
+            self.entries[name] = [size, mtime]
+            self.total_bytes += size
+        self._evict()
+        self.save_index()
+
+    def save_index(self) -> None:
+        """Atomically rewrite the index file, oldest segment first."""
+        with self.lock:
+            segments = [[name] + entry for name, entry in self.entries.items()]
+        tmp_path = index_path(self.folder) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"segments": segments}, f)
+        os.replace(tmp_path, index_path(self.folder))
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def _evict(self) -> List[str]:
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, (size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+            evicted.append(name)
+        return evicted
+
+    def put(self, name: str, data: bytes) -> str:
+        """
+        Write a segment into the store, evicting old ones to stay within budget.
+        Args:
+            name: Segment file name
+            data: Segment bytes
+        Returns:
+            Path of the stored segment
+        """
+        path = self.path(name)
+        tmp_path = path + ".part"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self.lock:
+            if name in self.entries:
+                self.total_bytes -= self.entries.pop(name)[0]
+            self.entries[name] = [len(data), now]
+            self.total_bytes += len(data)
+            self._evict()
+        self.save_index()
+        return path
+
+    def names(self) -> List[str]:
+        """Segment names currently in the store, oldest first."""
+        with self.lock:
+            return list(self.entries)
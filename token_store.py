@@ -0,0 +1,141 @@
+"""
+Persistent store of portal handshake tokens, keyed by (portal, MAC).
+
+hotrun.py reuses a stored token instead of handshaking again, re-handshakes
+only when a request made with a stored token fails, and saves the store at the
+end of a run so the next sweep starts with warm tokens. Stalker portals don't
+say when a token expires, so tokens are treated as valid for token_ttl seconds;
+an optional background thread re-handshakes tokens that are about to expire.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+token_store_file = "tokens.json"
+token_ttl = 6 * 3600
+# Tokens this close to expiry are refreshed by the background thread
+refresh_margin = 15 * 60
+refresh_interval = 60
+
+
+class TokenStore:
+    """Thread-safe (portal, MAC) -> token map persisted as JSON."""
+
+    def __init__(self, path: str = token_store_file, ttl: float = token_ttl):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # "portal|MAC" -> {"token": str, "obtained": float, "expires": float}
+        self.tokens: Dict[str, Dict] = {}
+        self.loaded = False
+        self.dirty = False
+        self.refresher: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def key(portal: str, mac: str) -> str:
+        return f"{portal.rstrip('/')}|{mac.upper()}"
+
+    def _load(self) -> None:
+        # Called with the lock held; the file is read on first use, not at import
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.tokens = json.load(f).get("tokens", {})
+        except (OSError, ValueError):
+            self.tokens = {}
+
+    def get(self, portal: str, mac: str) -> Optional[str]:
+        """Stored token for a MAC on a portal, or None if missing or expired."""
+        with self.lock:
+            self._load()
+            entry = self.tokens.get(self.key(portal, mac))
+            if entry and entry.get("expires", 0) > time.time():
+                return entry.get("token")
+            return None
+
+    def put(self, portal: str, mac: str, token: str) -> None:
+        now = time.time()
+        with self.lock:
+            self._load()
+            self.tokens[self.key(portal, mac)] = {"token": token, "obtained": now, "expires": now + self.ttl}
+            self.dirty = True
+
+    def invalidate(self, portal: str, mac: str) -> None:
+        """Forget a token the portal rejected."""
+        with self.lock:
+            self._load()
+            if self.tokens.pop(self.key(portal, mac), None) is not None:
+                self.dirty = True
+
+    def expiring(self, within: float) -> List[Tuple[str, str]]:
+        """
+        (portal, MAC) pairs whose tokens are still valid but expire within the given seconds.
+        Tokens that have already expired are dropped rather than returned, so MACs that
+        were removed from fixmac.txt or not harvested for a while are not refreshed.
+        """
+        now = time.time()
+        deadline = now + within
+        with self.lock:
+            self._load()
+            expired = [key for key, entry in self.tokens.items() if entry.get("expires", 0) <= now]
+            for key in expired:
+                del self.tokens[key]
+            if expired:
+                self.dirty = True
+            return [tuple(key.rsplit("|", 1)) for key, entry in self.tokens.items()
+                    if entry.get("expires", 0) <= deadline]
+
+    def save(self) -> None:
+        """Write the store atomically, dropping expired tokens."""
+        with self.lock:
+            if not self.loaded or not self.dirty:
+                return
+            now = time.time()
+            self.tokens = {key: entry for key, entry in self.tokens.items() if entry.get("expires", 0) > now}
+            data = json.dumps({"tokens": self.tokens}, indent=2)
+            self.dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def start_refresher(self, handshake: Callable[[str, str], Optional[str]],
+                        interval: float = refresh_interval) -> threading.Thread:
+        """
+        Re-handshake tokens shortly before they expire, on a daemon thread.
+        Args:
+            handshake: Function (portal, mac) -> new token or None
+            interval: Seconds between checks
+        """
+        if self.refresher is not None and self.refresher.is_alive():
+            return self.refresher
+        self.stopped.clear()
+
+        def run() -> None:
+            while not self.stopped.wait(interval):
+                for portal, mac in self.expiring(refresh_margin):
+                    if self.stopped.is_set():
+                        return
+                    try:
+                        token = handshake(portal, mac)
+                    except Exception:
+                        # Portal unreachable: keep the token until it expires
+                        continue
+                    if token:
+                        self.put(portal, mac, token)
+                    else:
+                        self.invalidate(portal, mac)
+                self.save()
+
+        self.refresher = threading.Thread(target=run, name="token-refresher", daemon=True)
+        self.refresher.start()
+        return self.refresher
+
+    def stop_refresher(self) -> None:
+        self.stopped.set()
@@ -72,6 +72,10 @@ def process_m3u_file(file_path):
             print(f"Error reading file {file_path}: {e}")
             return None
 
+    return check_m3u_lines(file_path, lines)
+
+def check_m3u_lines(file_path, lines):
+    """بررسی جریان خط 15 یک فایل m3u که خطوط آن از قبل خوانده شده است"""
     if len(lines) >= 15:
         stream_url = lines[14].strip()  # خط 15 (شاخص 14 در لیست)
         if stream_url.startswith('http'):
@@ -110,6 +114,10 @@ def main():
             except Exception as e:
                 print(f"Error processing file: {e}")
 
+    publish_best(valid_files)
+
+def publish_best(valid_files):
+    """کپی فایل‌های معتبر به پوشه best و mvp.m3u"""
     # کپی فایل‌های معتبر به پوشه best با نام‌های مرتب
     for index, file_path in enumerate(valid_files, start=1):
         best_file_path = os.path.join(best_folder, f"best{index}.m3u")
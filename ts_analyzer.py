@@ -0,0 +1,171 @@
+"""
+Fast MPEG-TS segment analyzer.
+
+Reads only the first and last packets of a segment through mmap to get its
+duration (from PCR, falling back to PES PTS) and average bitrate. Results are
+cached per file by size and mtime, optionally persisted to a JSON file, so
+re-indexing a large archive only touches new or changed segments.
+"""
+
+import os
+import json
+import mmap
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+TS_PACKET_SIZE = 188
+SYNC_BYTE = 0x47
+PCR_CLOCK = 27000000.0
+PTS_CLOCK = 90000.0
+PTS_WRAP = 1 << 33
+
+# Packets inspected at each end of the file
+probe_packets = 512
+
+
+class SegmentInfo(NamedTuple):
+    duration: Optional[float]  # seconds, None if no timestamps were found
+    bitrate: Optional[float]  # bits per second
+    size: int
+
+
+_cache: Dict[str, Tuple[int, int, SegmentInfo]] = {}
+_cache_lock = threading.Lock()
+
+
+def _find_sync(data, limit: int) -> Optional[int]:
+    """Return the offset of the first packet, checking two sync bytes in a row."""
+    for offset in range(min(limit, TS_PACKET_SIZE)):
+        if data[offset] == SYNC_BYTE and (offset + TS_PACKET_SIZE >= limit or
+                                          data[offset + TS_PACKET_SIZE] == SYNC_BYTE):
+            return offset
+    return None
+
+
+def _packet_pcr(data, offset: int) -> Optional[int]:
+    """Return the PCR of the packet at offset in 27MHz ticks, if it carries one."""
+    if data[offset] != SYNC_BYTE or not data[offset + 3] & 0x20:
+        return None
+    if data[offset + 4] < 7 or not data[offset + 5] & 0x10:
+        return None
+    b = data[offset + 6:offset + 12]
+    base = (b[0] << 25) | (b[1] << 17) | (b[2] << 9) | (b[3] << 1) | (b[4] >> 7)
+    return base * 300 + (((b[4] & 0x01) << 8) | b[5])
+
+
+def _packet_pts(data, offset: int) -> Optional[Tuple[int, int]]:
+    """Return (pid, PTS in 90kHz ticks) if the packet starts a PES with a PTS."""
+    if data[offset] != SYNC_BYTE or not data[offset + 1] & 0x40:
+        return None
+    pid = ((data[offset + 1] & 0x1F) << 8) | data[offset + 2]
+    adaptation = (data[offset + 3] >> 4) & 0x3
+    if not adaptation & 0x1:
+        return None
+    start = offset + 4
+    if adaptation & 0x2:
+        start += 1 + data[offset + 4]
+    end = offset + TS_PACKET_SIZE
+    if start + 14 > end or data[start:start + 3] != b'\x00\x00\x01':
+        return None
+    if not data[start + 7] & 0x80:
+        return None
+    p = data[start + 9:start + 14]
+    pts = ((p[0] >> 1) & 0x07) << 30 | p[1] << 22 | (p[2] >> 1) << 15 | p[3] << 7 | p[4] >> 1
+    return pid, pts
+
+
+def _scan(data, offsets) -> Tuple[Optional[int], Dict[int, int]]:
+    """Return the first PCR and the first PTS per PID seen over the given packet offsets."""
+    pcr = None
+    pts_by_pid = {}
+    for offset in offsets:
+        if pcr is None:
+            pcr = _packet_pcr(data, offset)
+        found = _packet_pts(data, offset)
+        if found is not None and found[0] not in pts_by_pid:
+            pts_by_pid[found[0]] = found[1]
+        if pcr is not None and pts_by_pid:
+            break
+    return pcr, pts_by_pid
+
+
+def _measure(data, size: int) -> Optional[float]:
+    """Measure the duration of a mapped TS file from its first and last packets."""
+    start = _find_sync(data, size)
+    if start is None:
+        return None
+    packet_count = (size - start) // TS_PACKET_SIZE
+    if packet_count < 2:
+        return None
+    head = (start + i * TS_PACKET_SIZE for i in range(min(probe_packets, packet_count)))
+    tail = (start + i * TS_PACKET_SIZE
+            for i in range(packet_count - 1, max(packet_count - 1 - probe_packets, -1), -1))
+    first_pcr, first_pts = _scan(data, head)
+    last_pcr, last_pts = _scan(data, tail)
+
+    if first_pcr is not None and last_pcr is not None and last_pcr > first_pcr:
+        return (last_pcr - first_pcr) / PCR_CLOCK
+    for pid, pts in first_pts.items():
+        if pid in last_pts and last_pts[pid] != pts:
+            return ((last_pts[pid] - pts) % PTS_WRAP) / PTS_CLOCK
+    return None
+
+
+def analyze_segment(path: str) -> SegmentInfo:
+    """
+    Get the duration and bitrate of a .ts file, using the cache when the file is unchanged.
+    Args:
+        path: Path to the segment
+    Returns:
+        SegmentInfo for the file
+    """
+    stat = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    duration = None
+    if stat.st_size >= TS_PACKET_SIZE:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            duration = _measure(data, stat.st_size)
+    bitrate = stat.st_size * 8 / duration if duration else None
+    info = SegmentInfo(duration, bitrate, stat.st_size)
+
+    with _cache_lock:
+        _cache[path] = (stat.st_size, stat.st_mtime_ns, info)
+    return info
+
+
+def load_cache(cache_file: str) -> None:
+    """
+    Load previously analyzed results from a JSON cache file.
+    Args:
+        cache_file: Path written by save_cache
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return
+    with _cache_lock:
+        for path, (size, mtime_ns, duration, bitrate) in entries.items():
+            _cache[path] = (size, mtime_ns, SegmentInfo(duration, bitrate, size))
+
+
+def save_cache(cache_file: str) -> None:
+    """
+    Persist analyzed results for files that still exist.
+    Args:
+        cache_file: Destination JSON file
+    """
+    with _cache_lock:
+        entries = {
+            path: [size, mtime_ns, info.duration, info.bitrate]
+            for path, (size, mtime_ns, info) in _cache.items()
+            if os.path.exists(path)
+        }
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    os.replace(tmp_file, cache_file)